@@ -1,17 +1,32 @@
-from flask import Flask, request, jsonify, render_template_string, send_file, session, redirect, url_for, make_response
+from flask import Flask, request, jsonify, render_template, send_from_directory, session, redirect, url_for, make_response, Response, stream_with_context
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import os
+import sys
 import boto3
 import json
 from datetime import datetime, timedelta
 import time
 import base64
 import logging
+import math
 import re
+import string
 import sqlite3
-from collections import defaultdict
+from collections import Counter, defaultdict
+from heapq import nlargest
+from itertools import islice
 import csv
 from io import StringIO 
+import gzip
+import hashlib
+import functools
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait, TimeoutError as FutureTimeoutError
+import threading
+from cachetools import TTLCache
+from jinja2 import FileSystemBytecodeCache
 
 # Try to load .env file if it exists (for development/testing)
 try:
@@ -20,9 +35,37 @@ try:
 except ImportError:
     pass  # dotenv not installed, continue without it
 
+# Fast C-backed HTML parser for help doc extraction (falls back to BeautifulSoup if missing)
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+# Aho-Corasick automaton for multi-term matching in result validation (falls back to a regex alternation if missing)
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Prefer lxml's C parser for BeautifulSoup when it is installed
+try:
+    import lxml  # noqa: F401
+    BS4_PARSER = 'lxml'
+except ImportError:
+    BS4_PARSER = 'html.parser'
+
+try:
+    import soupsieve
+except ImportError:
+    soupsieve = None  # Ships with beautifulsoup4; without it the regex fallback is used anyway
+
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', os.urandom(32).hex())
 app.permanent_session_lifetime = timedelta(hours=12)
+# Static assets are cache-busted with a ?v=<content hash> query string, so they can be cached for a year
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = timedelta(days=365)
+# Compiled templates are kept on disk too, so a restarted worker doesn't recompile login/dashboard pages
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache()
 
 # --- Authentication Configuration ---
 ADMIN_USERNAME = os.environ.get('ADMIN_USERNAME', 'Admin')
@@ -56,6 +99,116 @@ ZENDESK_SUBDOMAIN = os.environ.get('ZENDESK_SUBDOMAIN')
 ZENDESK_TOKEN = os.environ.get('ZENDESK_TOKEN')
 ZENDESK_EMAIL = os.environ.get('ZENDESK_EMAIL')
 
+# Transient failures retried by the adapter (GET only - a retried POST to Claude could bill twice).
+# raise_on_status=False hands the last response back so callers' status-code handling still applies.
+# Retry-After is ignored so a throttled upstream can't stretch the wait past the caller's own deadline.
+HTTP_RETRY = Retry(
+    total=3,
+    backoff_factor=0.4,
+    status_forcelist=(408, 429, 500, 502, 503, 504),
+    raise_on_status=False,
+    respect_retry_after_header=False,
+)
+
+# Provider searches run under SEARCH_TIMEOUT_SECONDS (25s): one retry after a 0.4s backoff, with
+# SEARCH_REQUEST_TIMEOUT per attempt, keeps a request to 2 * (3.05 + 8) + 0.4 = ~22.5s at worst
+SEARCH_HTTP_RETRY = Retry(
+    total=1,
+    backoff_factor=0.4,
+    status_forcelist=(408, 429, 500, 502, 503, 504),
+    raise_on_status=False,
+    respect_retry_after_header=False,
+)
+SEARCH_REQUEST_TIMEOUT = (3.05, 8)
+
+def build_http_session(pool_maxsize=16, retry=HTTP_RETRY):
+    """requests.Session with a pooled keep-alive HTTPS adapter and retries with exponential backoff"""
+    http = requests.Session()
+    http.mount('https://', HTTPAdapter(pool_connections=8, pool_maxsize=pool_maxsize, max_retries=retry))
+    return http
+
+def error_body_preview(response, limit=200):
+    """First bytes of an error response body for logging, without charset detection or decoding the whole body"""
+    return response.content[:limit].decode('utf-8', 'replace')
+
+def dig(obj, *path, default=''):
+    """Walk nested dicts/lists by key or index, returning default as soon as a step is missing"""
+    for step in path:
+        try:
+            obj = obj[step]
+        except (KeyError, IndexError, TypeError):
+            return default
+    return obj
+
+# Shared HTTP session for Claude calls - keeps TLS connections alive between requests
+HTTP_SESSION = build_http_session()
+# Help doc fetches run inside the query's search window, so they get the search retry policy and timeouts
+HELP_DOC_SESSION = build_http_session(retry=SEARCH_HTTP_RETRY)
+HELP_DOC_SESSION.headers['User-Agent'] = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+# One session per search provider, so each host keeps its own pool of warm connections.
+# Not used by the startup checks: those run in the gunicorn master and its sockets would be shared by every worker.
+JIRA_SESSION = build_http_session(retry=SEARCH_HTTP_RETRY)
+CONFLUENCE_SESSION = build_http_session(retry=SEARCH_HTTP_RETRY)
+ZENDESK_SESSION = build_http_session(retry=SEARCH_HTTP_RETRY)
+
+# Basic-auth request headers, built once from the (process-constant) credentials
+JIRA_AUTH_HEADERS = {
+    'Authorization': 'Basic ' + base64.b64encode(f"{JIRA_EMAIL}:{JIRA_TOKEN}".encode()).decode(),
+    'Accept': 'application/json'
+} if JIRA_EMAIL and JIRA_TOKEN else None
+ZENDESK_AUTH_HEADERS = {
+    'Authorization': 'Basic ' + base64.b64encode(f"{ZENDESK_EMAIL}/token:{ZENDESK_TOKEN}".encode()).decode(),
+    'Accept': 'application/json'
+} if ZENDESK_EMAIL and ZENDESK_TOKEN else None
+CONFLUENCE_AUTH_HEADERS = {
+    'Authorization': 'Basic ' + base64.b64encode(f"{CONFLUENCE_EMAIL}:{CONFLUENCE_TOKEN}".encode()).decode(),
+    'Accept': 'application/json'
+} if CONFLUENCE_EMAIL and CONFLUENCE_TOKEN else None
+
+# Provider sessions carry their credentials, so search calls don't pass auth on every request
+if JIRA_AUTH_HEADERS:
+    JIRA_SESSION.headers.update(JIRA_AUTH_HEADERS)
+if CONFLUENCE_AUTH_HEADERS:
+    CONFLUENCE_SESSION.headers.update(CONFLUENCE_AUTH_HEADERS)
+if ZENDESK_AUTH_HEADERS:
+    ZENDESK_SESSION.headers.update(ZENDESK_AUTH_HEADERS)
+
+# Shared pool for per-query outbound I/O (provider searches, content fetches) - threads are reused across requests.
+# Only leaf tasks go here: a task that waits on another task in the same pool can deadlock it.
+# Callers submit every task before reading any result, and read each future's result() once.
+# Pools are sized for every query in flight at once - each gunicorn thread (GUNICORN_THREADS, as in
+# gunicorn_conf.py) plus each /ask job worker - so one query's tasks never queue behind another's
+# and eat into its deadline. Idle executor threads are only started on demand.
+GUNICORN_THREADS = int(os.environ.get('GUNICORN_THREADS', 16))
+ASK_JOB_WORKERS = 8
+MAX_CONCURRENT_QUERIES = GUNICORN_THREADS + ASK_JOB_WORKERS
+# A query has at most 5 _IO_POOL tasks running at once: one per provider search, then up to 5 doc fetches
+IO_POOL_WORKERS = MAX_CONCURRENT_QUERIES * 5
+_IO_POOL = ThreadPoolExecutor(max_workers=IO_POOL_WORKERS, thread_name_prefix='io')
+# Athena insights (a slow Claude SQL-generation call) get their own pool, so a burst of queries can't
+# occupy every _IO_POOL thread and push the searches past their deadline
+ATHENA_INSIGHTS_WORKERS = 8
+ATHENA_INSIGHTS_TIMEOUT_SECONDS = 60
+_ATHENA_POOL = ThreadPoolExecutor(max_workers=ATHENA_INSIGHTS_WORKERS, thread_name_prefix='athena')
+# Separate pool for the JQL/CQL variants a single search fans out to (searches themselves run on _IO_POOL);
+# the JIRA and Confluence searches run up to 4 variants each, so 8 per query
+QUERY_VARIANT_WORKERS = MAX_CONCURRENT_QUERIES * 8
+_QUERY_VARIANT_POOL = ThreadPoolExecutor(max_workers=QUERY_VARIANT_WORKERS, thread_name_prefix='variant')
+
+def first_nonempty_variant(run_variant, variants):
+    """Run run_variant(i, variant) for all variants concurrently; return (i, result) for the first non-empty one in order"""
+    futures = [_QUERY_VARIANT_POOL.submit(run_variant, i, variant) for i, variant in enumerate(variants)]
+    try:
+        for i, future in enumerate(futures):
+            result = future.result()
+            if result:
+                return i, result
+        return None, []
+    finally:
+        # Variants that haven't started yet are no longer needed
+        for future in futures:
+            future.cancel()
+
 # Configure logging for production debugging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -71,69 +224,71 @@ logger.info(f"ZENDESK_SUBDOMAIN: {'SET' if ZENDESK_SUBDOMAIN else 'NOT SET'}")
 
 
 # --- FIX 2: Add Credential Validation at Startup ---
-def validate_api_credentials_on_startup():
-    """Test all API credentials at startup and log results"""
-    validation_results = {}
-
-    # Test JIRA
-    if JIRA_TOKEN and JIRA_EMAIL and JIRA_URL:
-        try:
-            auth = base64.b64encode(f"{JIRA_EMAIL}:{JIRA_TOKEN}".encode()).decode()
-            headers = {'Authorization': f'Basic {auth}', 'Accept': 'application/json'}
-            response = requests.get(f"{JIRA_URL}/rest/api/3/myself", headers=headers, timeout=10)
-            validation_results['jira'] = response.status_code == 200
-            if response.status_code != 200:
-                logger.error(f"JIRA validation failed: {response.status_code} - {response.text[:200]}")
-        except Exception as e:
-            validation_results['jira'] = False
-            logger.error(f"JIRA validation exception: {e}")
-    else:
-        validation_results['jira'] = False
+def _check_jira():
+    """Probe the JIRA credentials; returns ('jira', ok)"""
+    if not (JIRA_TOKEN and JIRA_EMAIL and JIRA_URL):
         logger.error("JIRA credentials missing")
+        return 'jira', False
+    try:
+        response = requests.get(f"{JIRA_URL}/rest/api/3/myself", headers=JIRA_AUTH_HEADERS, timeout=10)
+        if response.status_code != 200:
+            logger.error("JIRA validation failed: %s - %s", response.status_code, error_body_preview(response))
+        return 'jira', response.status_code == 200
+    except Exception as e:
+        logger.error(f"JIRA validation exception: {e}")
+        return 'jira', False
 
-    # Test Confluence
-    if CONFLUENCE_TOKEN and CONFLUENCE_EMAIL and CONFLUENCE_URL:
-        try:
-            response = requests.get(
-                f"{CONFLUENCE_URL}/rest/api/user/current",
-                auth=(CONFLUENCE_EMAIL, CONFLUENCE_TOKEN),
-                timeout=10
-            )
-            validation_results['confluence'] = response.status_code == 200
-            if response.status_code != 200:
-                logger.error(f"Confluence validation failed: {response.status_code}")
-        except Exception as e:
-            validation_results['confluence'] = False
-            logger.error(f"Confluence validation exception: {e}")
-    else:
-        validation_results['confluence'] = False
+def _check_confluence():
+    """Probe the Confluence credentials; returns ('confluence', ok)"""
+    if not (CONFLUENCE_TOKEN and CONFLUENCE_EMAIL and CONFLUENCE_URL):
         logger.error("Confluence credentials missing")
+        return 'confluence', False
+    try:
+        response = requests.get(
+            f"{CONFLUENCE_URL}/rest/api/user/current",
+            headers=CONFLUENCE_AUTH_HEADERS,
+            timeout=10
+        )
+        if response.status_code != 200:
+            logger.error(f"Confluence validation failed: {response.status_code}")
+        return 'confluence', response.status_code == 200
+    except Exception as e:
+        logger.error(f"Confluence validation exception: {e}")
+        return 'confluence', False
 
-    # Test Zendesk
-    if ZENDESK_TOKEN and ZENDESK_EMAIL and ZENDESK_SUBDOMAIN:
-        try:
-            auth = base64.b64encode(f"{ZENDESK_EMAIL}/token:{ZENDESK_TOKEN}".encode()).decode()
-            headers = {'Authorization': f'Basic {auth}', 'Accept': 'application/json'}
-            response = requests.get(
-                f"https://{ZENDESK_SUBDOMAIN}.zendesk.com/api/v2/users/me.json",
-                headers=headers,
-                timeout=10
-            )
-            validation_results['zendesk'] = response.status_code == 200
-            if response.status_code != 200:
-                logger.error(f"Zendesk validation failed: {response.status_code}")
-        except Exception as e:
-            validation_results['zendesk'] = False
-            logger.error(f"Zendesk validation exception: {e}")
-    else:
-        validation_results['zendesk'] = False
+def _check_zendesk():
+    """Probe the Zendesk credentials; returns ('zendesk', ok)"""
+    if not (ZENDESK_TOKEN and ZENDESK_EMAIL and ZENDESK_SUBDOMAIN):
         logger.error("ZENDESK credentials missing")
+        return 'zendesk', False
+    try:
+        response = requests.get(
+            f"https://{ZENDESK_SUBDOMAIN}.zendesk.com/api/v2/users/me.json",
+            headers=ZENDESK_AUTH_HEADERS,
+            timeout=10
+        )
+        if response.status_code != 200:
+            logger.error(f"Zendesk validation failed: {response.status_code}")
+        return 'zendesk', response.status_code == 200
+    except Exception as e:
+        logger.error(f"Zendesk validation exception: {e}")
+        return 'zendesk', False
+
+def validate_api_credentials_on_startup():
+    """Test all API credentials at startup (concurrently) and log results"""
+    checks = (_check_jira, _check_confluence, _check_zendesk)
+    # Submit every probe before waiting on any, so startup costs the slowest round-trip rather than the sum
+    with ThreadPoolExecutor(max_workers=len(checks)) as executor:
+        futures = [executor.submit(check) for check in checks]
+        validation_results = dict(future.result() for future in futures)
 
     logger.info(f"🔍 API Validation Results: {validation_results}")
     return validation_results
 
 # Execute validation on startup
 API_STATUS = validate_api_credentials_on_startup()
+# Process-lifetime set of integrations that passed validation, so callers can skip disabled ones up front
+ENABLED_SERVICES = frozenset(name for name, ok in API_STATUS.items() if ok)
 # --- END FIX 2 ---
 
 
@@ -158,6 +313,16 @@ def init_activity_db():
             athena_used BOOLEAN DEFAULT 0
         )
     ''')
+    # Background /ask jobs - kept in SQLite so any gunicorn worker can answer a poll
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ask_jobs (
+            id TEXT PRIMARY KEY,
+            agent_name TEXT NOT NULL,
+            status TEXT NOT NULL,
+            result TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
     conn.commit()
     conn.close()
     logger.info("Activity logging database initialized")
@@ -176,6 +341,54 @@ def log_agent_activity(agent_name, query_text, response_status='success', resour
     except Exception as e:
         logger.error(f"Error logging activity: {e}")
 
+# Pool that runs /ask jobs (ASK_JOB_WORKERS, defined with the I/O pools it sizes); separate from
+# _IO_POOL because a job waits on the searches it submits there
+ASK_JOB_RETENTION_HOURS = 24
+# A job still pending after this long was lost (its worker restarted or was recycled) and is reported as failed
+ASK_JOB_TIMEOUT_MINUTES = 10
+ASK_JOB_LOST_RESULT = {"error": "Your request was interrupted - please ask again"}
+_JOB_POOL = ThreadPoolExecutor(max_workers=ASK_JOB_WORKERS, thread_name_prefix='ask-job')
+
+def create_ask_job(agent_name):
+    """Insert a pending /ask job (pruning expired ones) and return its id"""
+    job_id = uuid.uuid4().hex
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        conn.execute("DELETE FROM ask_jobs WHERE created_at < datetime('now', ?)", (f'-{ASK_JOB_RETENTION_HOURS} hours',))
+        conn.execute("INSERT INTO ask_jobs (id, agent_name, status) VALUES (?, ?, 'pending')", (job_id, agent_name))
+        conn.commit()
+    finally:
+        conn.close()
+    return job_id
+
+def finish_ask_job(job_id, status, result):
+    """Store the final status and JSON result of an /ask job"""
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        try:
+            conn.execute("UPDATE ask_jobs SET status = ?, result = ? WHERE id = ?", (status, json.dumps(result), job_id))
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception as e:
+        logger.error(f"Error saving ask job {job_id}: {e}")
+
+def get_ask_job(job_id):
+    """Fetch an /ask job as a dict (result decoded), or None; a pending job past ASK_JOB_TIMEOUT_MINUTES is failed first"""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        conn.execute(
+            "UPDATE ask_jobs SET status = 'error', result = ? WHERE id = ? AND status = 'pending' AND created_at < datetime('now', ?)",
+            (json.dumps(ASK_JOB_LOST_RESULT), job_id, f'-{ASK_JOB_TIMEOUT_MINUTES} minutes'))
+        conn.commit()
+        row = conn.execute("SELECT agent_name, status, result FROM ask_jobs WHERE id = ?", (job_id,)).fetchone()
+    finally:
+        conn.close()
+    if not row:
+        return None
+    agent_name, status, result = row
+    return {'agent_name': agent_name, 'status': status, 'result': json.loads(result) if result else None}
+
 def get_activity_stats(days=30):
     """Get activity statistics for dashboard"""
     try:
@@ -294,29 +507,43 @@ init_activity_db()
 
 
 # --- REPLACEMENT FOR call_anthropic_api, WITH AI RESPONSE FIX ---
-def call_gemini_api(query, platform_resources=None, temperature=0.2):
-    """Call Claude API with system context."""
-    if not AI_API_KEY:
-        return "Error: CLAUDE_API_KEY is not configured."
+def format_platform_context(sources):
+    """Render (source, title, url, content) tuples into the prompt's DOCUMENTATION CONTENT block"""
+    if not sources:
+        return ""
+    parts = ["\n\nDOCUMENTATION CONTENT:\n"]
+    for i, (source, title, url, content) in enumerate(sources):
+        parts.append(f"\n=== {source.upper()} SOURCE {i+1}: {title} ===\n")
+        parts.append(f"URL: {url}\n")
+        parts.append(f"CONTENT:\n{content}\n")
+        parts.append("="*50 + "\n")
+    return ''.join(parts)
+
+MIN_CONTENT_CHARS = 50  # Shorter (stripped) content isn't worth sending to the model
+
+def has_meaningful_content(text):
+    """True if text is a string with more than MIN_CONTENT_CHARS characters once stripped"""
+    # The length check alone rejects most short strings before stripping copies anything
+    return isinstance(text, str) and len(text) > MIN_CONTENT_CHARS and len(text.strip()) > MIN_CONTENT_CHARS
+
+def has_content(resource):
+    """True for resource dicts carrying meaningful fetched content"""
+    return isinstance(resource, dict) and has_meaningful_content(resource.get('content'))
+
+def build_platform_context(platform_resources):
+    """Prompt context for the top 4 resources that have meaningful content"""
+    if not platform_resources:
+        return ""
+    sources = tuple(
+        (resource.get('source', 'documentation'), resource['title'], resource['url'],
+         # Use more content for Zendesk tickets (up to 8000 chars to include full comments)
+         resource['content'][:8000 if resource.get('source') == 'zendesk' else 2000])
+        for resource in islice(filter(has_content, platform_resources), 4)
+    )
+    return format_platform_context(sources)
 
-    try:
-        # Build context from retrieved content
-        platform_context = ""
-        if platform_resources and len(platform_resources) > 0:
-            resources_with_content = [r for r in platform_resources if isinstance(r, dict) and 'content' in r and len(r.get('content', '').strip()) > 50]
-            if resources_with_content:
-                platform_context = "\n\nDOCUMENTATION CONTENT:\n"
-                for i, resource in enumerate(resources_with_content[:4]):
-                    source_type = resource.get('source', 'documentation').upper()
-                    platform_context += f"\n=== {source_type} SOURCE {i+1}: {resource['title']} ===\n"
-                    platform_context += f"URL: {resource['url']}\n"
-
-                    # Use more content for Zendesk tickets (up to 8000 chars to include full comments)
-                    max_content = 8000 if resource.get('source') == 'zendesk' else 2000
-                    platform_context += f"CONTENT:\n{resource['content'][:max_content]}\n"
-                    platform_context += "="*50 + "\n"
-
-        system_instruction = """You are Blueshift support helping troubleshoot customer issues. Provide comprehensive, actionable responses formatted with Markdown.
+# Fixed parts of every support request - the system prompt and the (read-only) request headers
+CLAUDE_SYSTEM_INSTRUCTION = """You are Blueshift support helping troubleshoot customer issues. Provide comprehensive, actionable responses formatted with Markdown.
 
 Use **bold** for UI elements, key terms, menu paths, button names, and important concepts.
 
@@ -330,40 +557,122 @@ Provide:
 
 Be direct and practical."""
 
-        user_prompt = f"SUPPORT QUERY: {query}{platform_context}"
+CLAUDE_HEADERS = {
+    'Content-Type': 'application/json',
+    'x-api-key': AI_API_KEY,
+    'anthropic-version': '2023-06-01'
+}
 
-        headers = {
-            'Content-Type': 'application/json',
-            'x-api-key': AI_API_KEY,
-            'anthropic-version': '2023-06-01'
-        }
+def build_claude_request(query, platform_resources=None):
+    """Build the Claude messages API headers and payload for a support query"""
+    # Build context from retrieved content
+    platform_context = build_platform_context(platform_resources)
+    user_prompt = f"SUPPORT QUERY: {query}{platform_context}"
+
+    data = {
+        "model": CLAUDE_MODEL,
+        "max_tokens": 4000,
+        "temperature": 0.3,
+        "system": CLAUDE_SYSTEM_INSTRUCTION,
+        "messages": [{"role": "user", "content": user_prompt}]
+    }
 
-        data = {
-            "model": CLAUDE_MODEL,
-            "max_tokens": 4000,
-            "temperature": 0.3,
-            "system": system_instruction,
-            "messages": [{"role": "user", "content": user_prompt}]
-        }
+    return CLAUDE_HEADERS, data
+
+# Claude answers keyed on a hash of the full request payload - identical prompts skip the API round-trip
+CLAUDE_RESPONSE_CACHE = TTLCache(maxsize=256, ttl=3600)
+CLAUDE_RESPONSE_CACHE_LOCK = threading.Lock()
+CLAUDE_CACHE_MAX_TEMPERATURE = 0.5  # Sampling at or above this is meant to vary, so it is never cached
+
+def claude_cache_key(data):
+    """SHA-256 of the request payload, or None when the payload shouldn't be cached"""
+    if data.get('temperature', 1.0) >= CLAUDE_CACHE_MAX_TEMPERATURE:
+        return None
+    payload = json.dumps(data, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def get_cached_claude_response(key):
+    """Cached Claude answer for a cache key, or None"""
+    if key is None:
+        return None
+    with CLAUDE_RESPONSE_CACHE_LOCK:
+        return CLAUDE_RESPONSE_CACHE.get(key)
+
+def set_cached_claude_response(key, text):
+    """Store a successful Claude answer"""
+    if key is not None:
+        with CLAUDE_RESPONSE_CACHE_LOCK:
+            CLAUDE_RESPONSE_CACHE[key] = text
 
-        response = requests.post(CLAUDE_API_URL, headers=headers, json=data, timeout=60)
+def call_gemini_api(query, platform_resources=None, temperature=0.2):
+    """Call Claude API with system context."""
+    if not AI_API_KEY:
+        return "Error: CLAUDE_API_KEY is not configured."
+
+    try:
+        headers, data = build_claude_request(query, platform_resources)
+        cache_key = claude_cache_key(data)
+        cached = get_cached_claude_response(cache_key)
+        if cached is not None:
+            logger.info("⚡ Using cached Claude response")
+            return cached
+
+        response = HTTP_SESSION.post(CLAUDE_API_URL, headers=headers, json=data, timeout=60)
 
         if response.status_code == 200:
             response_json = response.json()
-            claude_response = response_json.get('content', [{}])[0].get('text', '').strip()
+            claude_response = dig(response_json, 'content', 0, 'text').strip()
             if claude_response:
                 logger.info("✓ Response generated using Claude")
+                set_cached_claude_response(cache_key, claude_response)
                 return claude_response
             return "API Error: Empty response from Claude"
         else:
-            error_msg = response.text[:500] if hasattr(response, 'text') else 'Unknown error'
-            logger.error(f"Claude API error {response.status_code}: {error_msg}")
+            logger.error("Claude API error %s: %s", response.status_code, error_body_preview(response, 500))
             return f"API Error: {response.status_code}"
 
     except Exception as e:
         logger.error(f"Claude API exception: {e}")
         return f"Error: {str(e)}"
 
+def stream_claude_api(query, platform_resources=None):
+    """Stream a Claude answer as text chunks; raises RuntimeError with the same messages call_gemini_api returns"""
+    if not AI_API_KEY:
+        raise RuntimeError("Error: CLAUDE_API_KEY is not configured.")
+
+    headers, data = build_claude_request(query, platform_resources)
+    cache_key = claude_cache_key(data)
+    cached = get_cached_claude_response(cache_key)
+    if cached is not None:
+        logger.info("⚡ Using cached Claude response")
+        yield cached
+        return
+    data["stream"] = True
+
+    with HTTP_SESSION.post(CLAUDE_API_URL, headers=headers, json=data, timeout=60, stream=True) as response:
+        if response.status_code != 200:
+            logger.error("Claude API error %s: %s", response.status_code, error_body_preview(response, 500))
+            raise RuntimeError(f"API Error: {response.status_code}")
+
+        chunks = []
+        for line in response.iter_lines(decode_unicode=True):
+            # Claude sends SSE frames; only the data lines carry events
+            if not line or not line.startswith('data:'):
+                continue
+            event = json.loads(line[5:])
+            if event.get('type') == 'content_block_delta' and dig(event, 'delta', 'type') == 'text_delta':
+                chunks.append(event['delta']['text'])
+                yield chunks[-1]
+            elif event.get('type') == 'error':
+                logger.error(f"Claude API stream error: {event.get('error')}")
+                raise RuntimeError(f"API Error: {dig(event, 'error', 'type', default='stream error')}")
+
+    answer = ''.join(chunks).strip()
+    if not answer:
+        raise RuntimeError("API Error: Empty response from Claude")
+    logger.info("✓ Response streamed using Claude")
+    set_cached_claude_response(cache_key, answer)
+
 def generate_followup_suggestions(original_query, ai_response):
     """Generate 3 relevant follow-up questions based on the query and response."""
     if not AI_API_KEY:
@@ -403,11 +712,11 @@ Can you show me an example implementation?"""
         }
 
         url_with_key = f"{GEMINI_API_URL_PRIMARY}?key={AI_API_KEY}"
-        response = requests.post(url_with_key, headers=headers, json=data, timeout=15)
+        response = HTTP_SESSION.post(url_with_key, headers=headers, json=data, timeout=15)
 
         if response.status_code == 200:
             response_json = response.json()
-            text = response_json.get('candidates', [{}])[0].get('content', {}).get('parts', [{}])[0].get('text', '').strip()
+            text = dig(response_json, 'candidates', 0, 'content', 'parts', 0, 'text').strip()
 
             logger.info(f"Follow-up API response: {text[:200]}")
 
@@ -435,8 +744,65 @@ def get_default_followup_suggestions(query):
         "Can you show me troubleshooting steps?"
     ]
 
+# Stop words shared by the JIRA/Confluence searches and Athena key-term extraction
+SEARCH_STOP_WORDS = frozenset({'why', 'is', 'my', 'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'how', 'what', 'when', 'where', 'who'})
+
+def clean_search_words(words):
+    """Drop stop words and words of two characters or fewer"""
+    return [w for w in words if len(w) > 2 and w.lower() not in SEARCH_STOP_WORDS]
+
+class SearchQuery:
+    """A JIRA/Confluence search query with its cleaned words, normalized once per search"""
+    __slots__ = ('raw', 'lower', 'words', 'words_lower')
+
+    def __init__(self, query):
+        self.raw = query
+        self.lower = query.lower()
+        words = query.strip().split()
+        # If we filtered out everything, use original words
+        self.words = clean_search_words(words) or words
+        self.words_lower = tuple(word.lower() for word in self.words)
+
+    def count_matches(self, text):
+        """Number of query words contained in (already lowercased) text"""
+        return sum(1 for word in self.words_lower if word in text)
+
+# Per-word clauses for the JQL/CQL variants; words are escaped with quote_search_term first
+JQL_WORD_CLAUSE = '(summary ~ "{0}" OR text ~ "{0}")'
+CQL_WORD_CLAUSE = '(title ~ "{0}" OR text ~ "{0}")'
+
+def quote_search_term(term):
+    """Escape a term for use inside a double-quoted JQL/CQL string"""
+    return term.replace('\\', '\\\\').replace('"', '\\"')
+
+def quote_search_phrase(phrase):
+    """Escape a phrase for an exact-phrase search (quoted once for the text search, again for the JQL/CQL string)"""
+    return quote_search_term(quote_search_term(phrase))
+
+# Provider search results, shared by overlapping questions for a few minutes
+SEARCH_RESULT_CACHE = TTLCache(maxsize=512, ttl=300)
+SEARCH_RESULT_CACHE_LOCK = threading.Lock()
+
+def ttl_cached(cache, lock):
+    """Memoize a search(query, ...) function in a TTL cache; empty (possibly failed) results are not cached"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(query, *args, **kwargs):
+            key = (fn.__name__, query.strip().lower(), args, tuple(sorted(kwargs.items())))
+            with lock:
+                cached = cache.get(key)
+            if cached is not None:
+                return list(cached)
+            result = fn(query, *args, **kwargs)
+            if result:
+                with lock:
+                    cache[key] = list(result)
+            return result
+        return wrapper
+    return decorator
 
 # --- FIX: JIRA Search - Switched to GET request for reliability ---
+@ttl_cached(SEARCH_RESULT_CACHE, SEARCH_RESULT_CACHE_LOCK)
 def search_jira_tickets_improved(query, limit=5, debug=True):
     """FIXED: Switched JIRA search from POST to GET with JQL in params for higher reliability, avoiding 410 error."""
     try:
@@ -444,57 +810,41 @@ def search_jira_tickets_improved(query, limit=5, debug=True):
             logger.warning("JIRA API not available - skipping search")
             return []
 
-        # Same stop words as Confluence
-        STOP_WORDS = {'why', 'is', 'my', 'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'how', 'what', 'when', 'where', 'who'}
-
-        def clean_words(words):
-            """Remove stop words and short words"""
-            return [w for w in words if len(w) > 2 and w.lower() not in STOP_WORDS]
-
-        auth = base64.b64encode(f"{JIRA_EMAIL}:{JIRA_TOKEN}".encode()).decode()
-        headers = {
-            'Authorization': f'Basic {auth}',
-            'Accept': 'application/json',
-        }
-
         # --- Clean query words ---
-        words = query.strip().split()
-        clean_query_words = clean_words(words)
-
-        if not clean_query_words:
-            clean_query_words = words
+        search_query = SearchQuery(query)
+        clean_query_words = search_query.words
 
         logger.info(f"JIRA search - Original: '{query}' -> Clean words: {clean_query_words}")
 
         # --- Build JQL queries progressively for GET request ---
         jql_variants = []
+        # One escaped clause per word, shared by every variant
+        word_clauses = {w: JQL_WORD_CLAUSE.format(quote_search_term(w)) for w in clean_query_words}
 
         # 1. Exact phrase (highest relevance)
-        jql_variants.append(f'summary ~ "\\"{query}\\"" ORDER BY updated DESC')
+        jql_variants.append(f'summary ~ "\\"{quote_search_phrase(query)}\\"" ORDER BY updated DESC')
 
         # 2. All clean words AND in summary and text (better relevance than OR)
         if len(clean_query_words) > 1:
-            and_parts = [f'(summary ~ "{w}" OR text ~ "{w}")' for w in clean_query_words]
+            and_parts = [word_clauses[w] for w in clean_query_words]
             jql_variants.append(f'({" AND ".join(and_parts)}) ORDER BY updated DESC')
 
         # 3. Most important words (fallback) - use the two longest/most significant words
         if len(clean_query_words) >= 2:
             important_words = sorted(clean_query_words, key=len, reverse=True)[:2]
-            important_parts = [f'(summary ~ "{w}" OR text ~ "{w}")' for w in important_words]
+            important_parts = [word_clauses[w] for w in important_words]
             jql_variants.append(f'({" AND ".join(important_parts)}) ORDER BY updated DESC')
 
         # 4. Clean words OR in summary and text (most reliable for finding results but least relevant)
-        or_parts = [f'(summary ~ "{w}" OR text ~ "{w}")' for w in clean_query_words]
+        or_parts = [word_clauses[w] for w in clean_query_words]
         jql_variants.append(f'({" OR ".join(or_parts)}) ORDER BY updated DESC')
 
         # Use the correct JIRA v3 API endpoint for JQL queries
         url = f"{JIRA_URL}/rest/api/3/search/jql"
 
-        # --- Try queries in order ---
-        final_issues = []
-        for i, jql in enumerate(jql_variants):
+        def run_jql(i, jql):
             try:
-                logger.info(f"Trying JIRA JQL #{i+1} (GET): {jql}")
+                logger.info("Trying JIRA JQL #%d (GET): %s", i + 1, jql)
 
                 params = {
                     'jql': jql,
@@ -503,25 +853,24 @@ def search_jira_tickets_improved(query, limit=5, debug=True):
                 }
 
                 # Use the correct v3 API endpoint with GET request
-                response = requests.get(url, headers=headers, params=params, timeout=15) 
+                response = JIRA_SESSION.get(url, params=params, timeout=SEARCH_REQUEST_TIMEOUT) 
 
                 if response.status_code == 200:
-                    data = response.json()
-                    issues = data.get('issues', [])
-
-                    if issues:
-                        logger.info(f"JIRA query #{i+1} returned {len(issues)} results. Breaking.")
-                        final_issues = issues
-                        break
-                    else:
-                        logger.info(f"JIRA query #{i+1} returned no results")
-                else:
-                    # Log the failed JIRA endpoint search error
-                    logger.error(f"JIRA API error on query #{i+1} (GET): {response.status_code} - {response.text[:200]}")
+                    issues = response.json().get('issues', [])
+                    if not issues:
+                        logger.info("JIRA query #%d returned no results", i + 1)
+                    return issues
+                # Log the failed JIRA endpoint search error
+                logger.error("JIRA API error on query #%d (GET): %s - %s", i + 1, response.status_code, error_body_preview(response))
+            except (requests.RequestException, ValueError) as e:
+                # Network/HTTP failures and bad JSON only - anything else is a bug and propagates
+                logger.error("JIRA query #%d failed: %s", i + 1, e)
+            return []
 
-            except Exception as e:
-                logger.error(f"JIRA query #{i+1} failed: {e}")
-                continue
+        # --- Run all queries at once, but take the first (most relevant) variant that has results ---
+        i, final_issues = first_nonempty_variant(run_jql, jql_variants)
+        if final_issues:
+            logger.info("JIRA query #%d returned %d results. Breaking.", i + 1, len(final_issues))
 
         if not final_issues:
             logger.info("No JIRA results found with any query variant")
@@ -532,10 +881,10 @@ def search_jira_tickets_improved(query, limit=5, debug=True):
             summary = issue.get('fields', {}).get('summary', '').lower()
 
             # Count partial word matches in summary (more lenient)
-            matches = sum(1 for word in clean_query_words if word.lower() in summary)
+            matches = search_query.count_matches(summary)
 
             # Bonus for exact phrase match
-            exact_bonus = 50 if query.lower() in summary else 0
+            exact_bonus = 50 if search_query.lower in summary else 0
 
             # Bonus for multiple word matches (AND logic preference)
             if len(clean_query_words) > 1:
@@ -560,20 +909,20 @@ def search_jira_tickets_improved(query, limit=5, debug=True):
             total_score = (matches * 10) + exact_bonus + completeness_bonus + priority_bonus + type_bonus + base_score
             return total_score
 
-        # Sort by relevance score
-        scored_issues = [(score_issue(issue), issue) for issue in final_issues]
-        scored_issues.sort(reverse=True, key=lambda x: x[0])
+        # Keep only the top `limit` by relevance score (nlargest keeps sorted()'s order for ties)
+        scored_issues = nlargest(limit, ((score_issue(issue), issue) for issue in final_issues), key=lambda x: x[0])
 
-        # Debug log top scoring issues
-        logger.info(f"JIRA scoring results:")
-        for i, (score, issue) in enumerate(scored_issues[:5]):
-            summary = issue.get('fields', {}).get('summary', 'No summary')
-            key = issue.get('key', 'Unknown')
-            logger.info(f"  {i+1}. Score: {score} - {key}: {summary[:50]}...")
+        # Debug log top scoring issues (skip the per-issue lookups unless DEBUG is on)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("JIRA scoring results:")
+            for i, (score, issue) in enumerate(scored_issues):
+                summary = issue.get('fields', {}).get('summary', 'No summary')
+                key = issue.get('key', 'Unknown')
+                logger.debug("  %d. Score: %s - %s: %s...", i + 1, score, key, summary[:50])
 
         # --- Format results ---
         results = []
-        for score, issue in scored_issues[:limit]:
+        for score, issue in scored_issues:
             summary = issue.get('fields', {}).get('summary', 'No summary')
             key = issue.get('key', 'Unknown')
             results.append({
@@ -585,11 +934,12 @@ def search_jira_tickets_improved(query, limit=5, debug=True):
         return results
 
     except Exception as e:
-        logger.error(f"JIRA search error: {e}")
+        logger.error(f"JIRA search error: {e}", exc_info=True)
         return []
 # --- END FIX ---
 
 # --- FIX: Confluence Search - Bypassed Validation for Raw Results ---
+@ttl_cached(SEARCH_RESULT_CACHE, SEARCH_RESULT_CACHE_LOCK)
 def search_confluence_docs_improved(query, limit=5, space_key=None, debug=True):
     """
     FIXED: Confluence search logic. Returns raw results, relying on central validation.
@@ -599,13 +949,6 @@ def search_confluence_docs_improved(query, limit=5, space_key=None, debug=True):
             logger.warning("Confluence API not available - skipping search")
             return []
 
-        # Stop words that break Confluence CQL
-        STOP_WORDS = {'why', 'is', 'my', 'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'how', 'what', 'when', 'where', 'who'}
-
-        def clean_words(words):
-            """Remove stop words and short words"""
-            return [w for w in words if len(w) > 2 and w.lower() not in STOP_WORDS]
-
         def run_search(cql):
             url = f"{CONFLUENCE_URL}/rest/api/content/search"
             params = {
@@ -613,34 +956,33 @@ def search_confluence_docs_improved(query, limit=5, space_key=None, debug=True):
                 "limit": limit * 10,   # pull more for debugging
                 "expand": "content"
             }
-            resp = requests.get(url, params=params, auth=(CONFLUENCE_EMAIL, CONFLUENCE_TOKEN), timeout=15)
+            resp = CONFLUENCE_SESSION.get(url, params=params, timeout=SEARCH_REQUEST_TIMEOUT)
             resp.raise_for_status()
             return resp.json().get("results", [])
 
         # --- Clean query words ---
-        words = query.strip().split()
-        clean_query_words = clean_words(words)
-
-        # If we filtered out everything, use original words
-        if not clean_query_words:
-            clean_query_words = words
+        search_query = SearchQuery(query)
+        clean_query_words = search_query.words
 
         logger.info(f"Original query: '{query}' -> Clean words: {clean_query_words}")
 
         # --- Build queries progressively ---
         cql_variants = []
+        # One escaped clause per word, shared by every variant
+        word_clauses = {w: CQL_WORD_CLAUSE.format(quote_search_term(w)) for w in clean_query_words}
+        phrase = quote_search_phrase(query)
 
         # 1. Exact phrase (standard fields)
-        cql_variants.append(f'text ~ "\\"{query}\\"" OR title ~ "\\"{query}\\""')
+        cql_variants.append(f'text ~ "\\"{phrase}\\"" OR title ~ "\\"{phrase}\\""')
 
         # 2. Clean words AND (standard fields)
         if len(clean_query_words) > 1:
-            and_parts = [f'(title ~ "{w}" OR text ~ "{w}")' for w in clean_query_words]
+            and_parts = [word_clauses[w] for w in clean_query_words]
             cql_variants.append(" AND ".join(and_parts))
 
         # 3. Clean words OR (standard fields)
-        or_parts = [f'(title ~ "{w}" OR text ~ "{w}")' for w in clean_query_words]
-        or_parts.append(f'content ~ "{query}"')
+        or_parts = [word_clauses[w] for w in clean_query_words]
+        or_parts.append(f'content ~ "{quote_search_term(query)}"')
         cql_variants.append(" OR ".join(or_parts))
 
 
@@ -648,32 +990,30 @@ def search_confluence_docs_improved(query, limit=5, space_key=None, debug=True):
         if len(clean_query_words) > 1:
             # Use longest word as most likely to be significant
             main_word = max(clean_query_words, key=len)
-            cql_variants.append(f'title ~ "{main_word}" OR text ~ "{main_word}"')
+            cql_variants.append(word_clauses[main_word])
 
         # Add space filter if provided
         if space_key:
-            cql_variants = [f'space.key = "{space_key}" AND ({c})' for c in cql_variants]
+            cql_variants = [f'space.key = "{quote_search_term(space_key)}" AND ({c})' for c in cql_variants]
 
-        # --- Try queries in order ---
-        final_results = []
-        for i, cql in enumerate(cql_variants):
+        def run_cql(i, cql):
             try:
-                logger.info(f"Trying Confluence CQL #{i+1}: {cql}")
+                logger.info("Trying Confluence CQL #%d: %s", i + 1, cql)
                 results = run_search(cql)
-
-                if results:
-                    final_results = results
-                    logger.info(f"Query #{i+1} returned {len(results)} results. Using these results.")
-                    break
-                else:
-                    logger.info(f"Query #{i+1} returned no results, trying next query...")
-
+                if not results:
+                    logger.info("Query #%d returned no results", i + 1)
+                return results
             except requests.exceptions.HTTPError as http_e:
-                 logger.error(f"Confluence query #{i+1} failed HTTP: {http_e.response.status_code} - {http_e.response.text[:100]}", exc_info=True)
-                 continue
-            except Exception as e:
-                logger.error(f"Confluence query #{i+1} failed: {e}", exc_info=True)
-                continue
+                 logger.error("Confluence query #%d failed HTTP: %s - %s", i + 1, http_e.response.status_code, error_body_preview(http_e.response, 100), exc_info=True)
+            except (requests.RequestException, ValueError) as e:
+                # Network/HTTP failures and bad JSON only - anything else is a bug and propagates
+                logger.error("Confluence query #%d failed: %s", i + 1, e, exc_info=True)
+            return []
+
+        # --- Run all queries at once, but take the first (most relevant) variant that has results ---
+        i, final_results = first_nonempty_variant(run_cql, cql_variants)
+        if final_results:
+            logger.info("Query #%d returned %d results. Using these results.", i + 1, len(final_results))
 
         if not final_results:
              logger.info("No Confluence results found with any query variant")
@@ -685,16 +1025,16 @@ def search_confluence_docs_improved(query, limit=5, space_key=None, debug=True):
             title = (r.get("title") or "").lower()
 
             # Check if any clean words appear in title
-            title_word_matches = sum(1 for word in clean_query_words if word.lower() in title)
+            title_word_matches = search_query.count_matches(title)
             boost = title_word_matches * 5  # Small boost per matching word
 
             return api_score * 100 + boost
 
-        ranked = sorted(final_results, key=score_fn, reverse=True)
+        ranked = nlargest(limit, final_results, key=score_fn)
 
         # --- Format results ---
         formatted = []
-        for r in ranked[:limit]:
+        for r in ranked:
             # Try multiple ways to get the page ID due to different Confluence API response formats
             page_id = r.get("content", {}).get("id") or r.get("id")
             title = r.get("title") or "Untitled"
@@ -734,22 +1074,16 @@ def get_zendesk_ticket_details(ticket_id):
         return None
 
     try:
-        auth = base64.b64encode(f"{ZENDESK_EMAIL}/token:{ZENDESK_TOKEN}".encode()).decode()
-        headers = {
-            'Authorization': f'Basic {auth}',
-            'Accept': 'application/json'
-        }
-
         # Fetch ticket details
         ticket_url = f"https://{ZENDESK_SUBDOMAIN}.zendesk.com/api/v2/tickets/{ticket_id}.json"
-        response = requests.get(ticket_url, headers=headers, timeout=20)
+        response = ZENDESK_SESSION.get(ticket_url, timeout=SEARCH_REQUEST_TIMEOUT)
 
         if response.status_code == 200:
             ticket_data = response.json().get('ticket', {})
 
             # Fetch comments
             comments_url = f"https://{ZENDESK_SUBDOMAIN}.zendesk.com/api/v2/tickets/{ticket_id}/comments.json"
-            comments_response = requests.get(comments_url, headers=headers, timeout=20)
+            comments_response = ZENDESK_SESSION.get(comments_url, timeout=SEARCH_REQUEST_TIMEOUT)
             comments = []
             if comments_response.status_code == 200:
                 comments = comments_response.json().get('comments', [])
@@ -773,6 +1107,10 @@ def get_zendesk_ticket_details(ticket_id):
         logger.error(f"Exception fetching ticket {ticket_id}: {e}")
         return None
 
+ZENDESK_TICKET_URL_RE = re.compile(r'zendesk\.com/agent/tickets/(\d+)', re.IGNORECASE)
+ZENDESK_TICKET_ID_RE = re.compile(r'(?:ticket\s*#?|#)(\d{5,})', re.IGNORECASE)
+
+@ttl_cached(SEARCH_RESULT_CACHE, SEARCH_RESULT_CACHE_LOCK)
 def search_zendesk_tickets_improved(query, limit=5):
     """Simplified Zendesk search, using API_STATUS. Also checks for specific ticket ID requests."""
     if not API_STATUS.get('zendesk', False):
@@ -787,8 +1125,8 @@ def search_zendesk_tickets_improved(query, limit=5):
         # - ticket #12345
         # - ticket 12345
         # - #12345
-        ticket_url_match = re.search(r'zendesk\.com/agent/tickets/(\d+)', query, re.IGNORECASE)
-        ticket_id_match = re.search(r'(?:ticket\s*#?|#)(\d{5,})', query, re.IGNORECASE)
+        ticket_url_match = ZENDESK_TICKET_URL_RE.search(query)
+        ticket_id_match = ZENDESK_TICKET_ID_RE.search(query)
 
         ticket_id = None
         if ticket_url_match:
@@ -813,12 +1151,6 @@ def search_zendesk_tickets_improved(query, limit=5):
                 logger.warning(f"Failed to fetch ticket details for ticket #{ticket_id}")
 
         # Otherwise, perform regular search
-        auth = base64.b64encode(f"{ZENDESK_EMAIL}/token:{ZENDESK_TOKEN}".encode()).decode()
-        headers = {
-            'Authorization': f'Basic {auth}',
-            'Accept': 'application/json'
-        }
-
         url = f"https://{ZENDESK_SUBDOMAIN}.zendesk.com/api/v2/search.json"
         params = {
             'query': f'({query}) type:ticket',
@@ -827,7 +1159,7 @@ def search_zendesk_tickets_improved(query, limit=5):
             'sort_order': 'desc'
         }
 
-        response = requests.get(url, headers=headers, params=params, timeout=20)
+        response = ZENDESK_SESSION.get(url, params=params, timeout=SEARCH_REQUEST_TIMEOUT)
 
         if response.status_code == 200:
             data = response.json()
@@ -845,7 +1177,7 @@ def search_zendesk_tickets_improved(query, limit=5):
             logger.info(f"Zendesk search returned {len(results)} results for '{query}'")
             return results
         else:
-            logger.error(f"ZENDESK search failed: {response.status_code} - {response.text[:200]}")
+            logger.error("ZENDESK search failed: %s - %s", response.status_code, error_body_preview(response))
             return []
 
     except Exception as e:
@@ -854,17 +1186,58 @@ def search_zendesk_tickets_improved(query, limit=5):
 # --- END FIX 3 ---
 
 
+# EXPANDED curated help doc list (fallback when the Help Center API has no results)
+HELP_DOCS = [
+    {"title": "Campaign Studio - Journey Tab & Detail Mode", "url": "https://help.blueshift.com/hc/en-us/articles/4408704180499-Campaign-studio", "keywords": ["campaign", "studio", "journey", "detail", "mode", "trigger", "troubleshoot", "filter", "conditions", "navigation"]},
+    {"title": "User Journey in Campaign - Trigger Troubleshooting", "url": "https://help.blueshift.com/hc/en-us/articles/4408704006675-User-journey-in-a-campaign", "keywords": ["user", "journey", "trigger", "troubleshoot", "not", "sending", "evaluation", "filter", "conditions"]},
+    {"title": "Triggered Campaigns - Setup and Configuration", "url": "https://help.blueshift.com/hc/en-us/articles/4405437140115-Triggered-workflows", "keywords": ["triggered", "campaigns", "workflows", "configuration", "setup", "automation", "troubleshoot", "not", "working"]},
+    {"title": "Event Triggered Campaigns", "url": "https://help.blueshift.com/hc/en-us/articles/360050760774-Transactions-in-event-triggered-campaigns", "keywords": ["event", "triggered", "campaigns", "transactions", "setup", "troubleshoot", "not", "firing"]},
+    {"title": "Trigger Actions and Conditions", "url": "https://help.blueshift.com/hc/en-us/articles/4408725448467-Trigger-Actions", "keywords": ["trigger", "actions", "conditions", "platform", "navigation", "check", "edit", "setup"]},
+    {"title": "Campaign Flow Control and Filters", "url": "https://help.blueshift.com/hc/en-us/articles/4408717301651-Campaign-flow-control", "keywords": ["flow", "control", "filters", "conditions", "trigger", "exit", "journey", "not", "working"]},
+    {"title": "Journey Testing and Debugging", "url": "https://help.blueshift.com/hc/en-us/articles/4408718647059-Journey-testing", "keywords": ["journey", "testing", "troubleshoot", "debug", "trigger", "not", "working", "preview", "test"]},
+    {"title": "Campaign Execution and Troubleshooting", "url": "https://help.blueshift.com/hc/en-us/articles/19600265288979-Campaign-execution-overview", "keywords": ["campaign", "execution", "troubleshoot", "trigger", "not", "sending", "issues", "monitoring"]},
+    {"title": "Mobile Push Notifications", "url": "https://help.blueshift.com/hc/en-us/articles/115002714413-Push-notifications", "keywords": ["mobile", "push", "notifications", "app", "trigger", "cloud", "messaging", "setup"]},
+    {"title": "In-App Messages Setup", "url": "https://help.blueshift.com/hc/en-us/articles/360043199611-In-app-messages", "keywords": ["in-app", "messages", "mobile", "app", "trigger", "cloud", "setup", "configuration"]},
+    {"title": "Mobile SDK Integration", "url": "https://help.blueshift.com/hc/en-us/articles/360043199451-Mobile-SDK", "keywords": ["mobile", "sdk", "integration", "app", "trigger", "cloud", "setup", "configuration"]},
+    {"title": "Email Campaign Creation", "url": "https://help.blueshift.com/hc/en-us/articles/115002714173-Email-campaigns", "keywords": ["email", "campaign", "create", "setup", "subject", "line", "personalization", "template"]},
+    {"title": "Personalization and Dynamic Content", "url": "https://help.blueshift.com/hc/en-us/articles/115002714253-Personalization", "keywords": ["personalization", "dynamic", "content", "subject", "line", "custom", "attributes", "merge"]},
+    {"title": "Segmentation Overview", "url": "https://help.blueshift.com/hc/en-us/articles/115002669413-Segmentation-overview", "keywords": ["segmentation", "audience", "targeting", "segments", "customer", "groups", "filters"]},
+    {"title": "Facebook Conversions API", "url": "https://help.blueshift.com/hc/en-us/articles/24009984649235-Facebook-Conversions-API", "keywords": ["facebook", "conversions", "api", "integration", "tracking", "audience", "syndication", "setup"]},
+    {"title": "Facebook Audience Syndication", "url": "https://help.blueshift.com/hc/en-us/articles/360046864473-Facebook-audience", "keywords": ["facebook", "audience", "syndication", "lookalike", "custom", "integration", "setup", "troubleshoot"]},
+    {"title": "External Fetch Configuration", "url": "https://help.blueshift.com/hc/en-us/articles/360006449754-External-fetch", "keywords": ["external", "fetch", "api", "integration", "troubleshoot", "error", "failed", "configuration"]},
+    {"title": "Webhook Integration Setup", "url": "https://help.blueshift.com/hc/en-us/articles/115002714333-Webhooks", "keywords": ["webhook", "integration", "api", "external", "setup", "troubleshoot", "failed", "configuration"]},
+]
+
+# Word sets per doc (index-aligned with HELP_DOCS), built once instead of on every search
+HELP_DOC_TITLE_WORDS = [frozenset(doc['title'].lower().split()) for doc in HELP_DOCS]
+HELP_DOC_KEYWORD_WORDS = [frozenset(' '.join(doc['keywords']).lower().split()) for doc in HELP_DOCS]
+HELP_DOC_STOP_WORDS = frozenset({'the', 'a', 'an', 'and', 'or', 'but'})
+MOBILE_QUERY_WORDS = frozenset({'app', 'mobile', 'cloud'})
+MOBILE_DOC_KEYWORDS = frozenset({'mobile', 'app', 'push', 'cloud'})
+TROUBLESHOOT_QUERY_WORDS = frozenset({'not', 'troubleshoot', 'debug', 'help', 'issue'})
+TROUBLESHOOT_DOC_KEYWORDS = frozenset({'troubleshoot', 'not', 'working', 'debug'})
+
+# Inverted index word -> HELP_DOCS indices (title and keyword words), plus the docs each bonus can reach
+def build_help_doc_index():
+    """Map every title/keyword word to the frozenset of HELP_DOCS indices containing it"""
+    index = defaultdict(set)
+    for doc_index, (title_words, keyword_words) in enumerate(zip(HELP_DOC_TITLE_WORDS, HELP_DOC_KEYWORD_WORDS)):
+        for word in title_words | keyword_words:
+            index[word].add(doc_index)
+    return {word: frozenset(indices) for word, indices in index.items()}
+
+HELP_DOC_INDEX = build_help_doc_index()
+MOBILE_DOC_INDICES = frozenset(i for i, words in enumerate(HELP_DOC_KEYWORD_WORDS) if not words.isdisjoint(MOBILE_DOC_KEYWORDS))
+TROUBLESHOOT_DOC_INDICES = frozenset(i for i, words in enumerate(HELP_DOC_KEYWORD_WORDS) if not words.isdisjoint(TROUBLESHOOT_DOC_KEYWORDS))
+
+@ttl_cached(SEARCH_RESULT_CACHE, SEARCH_RESULT_CACHE_LOCK)
 def search_help_docs(query, limit=3):
     """IMPROVED help docs search with better trigger/mobile coverage (using curated list as fallback)"""
     try:
         # Try API search first
-        if ZENDESK_SUBDOMAIN and ZENDESK_TOKEN and API_STATUS.get('zendesk', False):
+        if 'zendesk' in ENABLED_SERVICES:
             if ZENDESK_EMAIL:
-                auth = base64.b64encode(f"{ZENDESK_EMAIL}/token:{ZENDESK_TOKEN}".encode()).decode()
-                headers = {
-                    'Authorization': f'Basic {auth}',
-                    'Accept': 'application/json'
-                }
+                headers = None  # Basic auth is already set on ZENDESK_SESSION
             else:
                 headers = {
                     'Authorization': f'Bearer {ZENDESK_TOKEN}',
@@ -872,10 +1245,10 @@ def search_help_docs(query, limit=3):
                 }
 
             search_url = f"https://{ZENDESK_SUBDOMAIN}.zendesk.com/api/v2/help_center/articles/search.json"
-            response = requests.get(search_url, headers=headers, params={
+            response = ZENDESK_SESSION.get(search_url, headers=headers, params={
                 'query': query,
                 'per_page': 8  # Get more results
-            }, timeout=15)
+            }, timeout=SEARCH_REQUEST_TIMEOUT)
 
             if response.status_code == 200:
                 data = response.json()
@@ -895,111 +1268,113 @@ def search_help_docs(query, limit=3):
     except Exception as e:
         logger.error(f"Help Center API search error: {e}")
 
-    # EXPANDED curated list logic (kept as solid fallback)
-    help_docs_expanded = [
-        {"title": "Campaign Studio - Journey Tab & Detail Mode", "url": "https://help.blueshift.com/hc/en-us/articles/4408704180499-Campaign-studio", "keywords": ["campaign", "studio", "journey", "detail", "mode", "trigger", "troubleshoot", "filter", "conditions", "navigation"]},
-        {"title": "User Journey in Campaign - Trigger Troubleshooting", "url": "https://help.blueshift.com/hc/en-us/articles/4408704006675-User-journey-in-a-campaign", "keywords": ["user", "journey", "trigger", "troubleshoot", "not", "sending", "evaluation", "filter", "conditions"]},
-        {"title": "Triggered Campaigns - Setup and Configuration", "url": "https://help.blueshift.com/hc/en-us/articles/4405437140115-Triggered-workflows", "keywords": ["triggered", "campaigns", "workflows", "configuration", "setup", "automation", "troubleshoot", "not", "working"]},
-        {"title": "Event Triggered Campaigns", "url": "https://help.blueshift.com/hc/en-us/articles/360050760774-Transactions-in-event-triggered-campaigns", "keywords": ["event", "triggered", "campaigns", "transactions", "setup", "troubleshoot", "not", "firing"]},
-        {"title": "Trigger Actions and Conditions", "url": "https://help.blueshift.com/hc/en-us/articles/4408725448467-Trigger-Actions", "keywords": ["trigger", "actions", "conditions", "platform", "navigation", "check", "edit", "setup"]},
-        {"title": "Campaign Flow Control and Filters", "url": "https://help.blueshift.com/hc/en-us/articles/4408717301651-Campaign-flow-control", "keywords": ["flow", "control", "filters", "conditions", "trigger", "exit", "journey", "not", "working"]},
-        {"title": "Journey Testing and Debugging", "url": "https://help.blueshift.com/hc/en-us/articles/4408718647059-Journey-testing", "keywords": ["journey", "testing", "troubleshoot", "debug", "trigger", "not", "working", "preview", "test"]},
-        {"title": "Campaign Execution and Troubleshooting", "url": "https://help.blueshift.com/hc/en-us/articles/19600265288979-Campaign-execution-overview", "keywords": ["campaign", "execution", "troubleshoot", "trigger", "not", "sending", "issues", "monitoring"]},
-        {"title": "Mobile Push Notifications", "url": "https://help.blueshift.com/hc/en-us/articles/115002714413-Push-notifications", "keywords": ["mobile", "push", "notifications", "app", "trigger", "cloud", "messaging", "setup"]},
-        {"title": "In-App Messages Setup", "url": "https://help.blueshift.com/hc/en-us/articles/360043199611-In-app-messages", "keywords": ["in-app", "messages", "mobile", "app", "trigger", "cloud", "setup", "configuration"]},
-        {"title": "Mobile SDK Integration", "url": "https://help.blueshift.com/hc/en-us/articles/360043199451-Mobile-SDK", "keywords": ["mobile", "sdk", "integration", "app", "trigger", "cloud", "setup", "configuration"]},
-        {"title": "Email Campaign Creation", "url": "https://help.blueshift.com/hc/en-us/articles/115002714173-Email-campaigns", "keywords": ["email", "campaign", "create", "setup", "subject", "line", "personalization", "template"]},
-        {"title": "Personalization and Dynamic Content", "url": "https://help.blueshift.com/hc/en-us/articles/115002714253-Personalization", "keywords": ["personalization", "dynamic", "content", "subject", "line", "custom", "attributes", "merge"]},
-        {"title": "Segmentation Overview", "url": "https://help.blueshift.com/hc/en-us/articles/115002669413-Segmentation-overview", "keywords": ["segmentation", "audience", "targeting", "segments", "customer", "groups", "filters"]},
-        {"title": "Facebook Conversions API", "url": "https://help.blueshift.com/hc/en-us/articles/24009984649235-Facebook-Conversions-API", "keywords": ["facebook", "conversions", "api", "integration", "tracking", "audience", "syndication", "setup"]},
-        {"title": "Facebook Audience Syndication", "url": "https://help.blueshift.com/hc/en-us/articles/360046864473-Facebook-audience", "keywords": ["facebook", "audience", "syndication", "lookalike", "custom", "integration", "setup", "troubleshoot"]},
-        {"title": "External Fetch Configuration", "url": "https://help.blueshift.com/hc/en-us/articles/360006449754-External-fetch", "keywords": ["external", "fetch", "api", "integration", "troubleshoot", "error", "failed", "configuration"]},
-        {"title": "Webhook Integration Setup", "url": "https://help.blueshift.com/hc/en-us/articles/115002714333-Webhooks", "keywords": ["webhook", "integration", "api", "external", "setup", "troubleshoot", "failed", "configuration"]},
-    ]
 
     query_lower = query.lower()
     query_words = set(query_lower.split())
 
-    stop_words = {'the', 'a', 'an', 'and', 'or', 'but'}
-    clean_query_words = [w for w in query_words if w not in stop_words and len(w) > 1]
+    clean_query_words = frozenset(w for w in query_words if w not in HELP_DOC_STOP_WORDS and len(w) > 1)
+    is_trigger_query = 'trigger' in clean_query_words
+    is_mobile_query = not clean_query_words.isdisjoint(MOBILE_QUERY_WORDS)
+    is_troubleshoot_query = not clean_query_words.isdisjoint(TROUBLESHOOT_QUERY_WORDS)
+
+    # Only docs sharing a word with the query (or eligible for a bonus) can score above zero
+    candidates = set()
+    for word in clean_query_words:
+        candidates |= HELP_DOC_INDEX.get(word, frozenset())
+    if is_trigger_query and is_mobile_query:
+        candidates |= MOBILE_DOC_INDICES
+    if is_troubleshoot_query:
+        candidates |= TROUBLESHOOT_DOC_INDICES
 
     scored_docs = []
-    for doc in help_docs_expanded:
-        score = 0
-        title_words = set(doc['title'].lower().split())
-        title_matches = len([w for w in clean_query_words if w in title_words])
-        score += title_matches * 8
-
-        keyword_words = set(' '.join(doc['keywords']).lower().split())
-        keyword_matches = len([w for w in clean_query_words if w in keyword_words])
-        score += keyword_matches * 4
-
-        if 'trigger' in clean_query_words:
-            if 'trigger' in doc['keywords']:
+    for doc_index in sorted(candidates):
+        doc, title_words, keyword_words = HELP_DOCS[doc_index], HELP_DOC_TITLE_WORDS[doc_index], HELP_DOC_KEYWORD_WORDS[doc_index]
+        score = len(clean_query_words & title_words) * 8
+        score += len(clean_query_words & keyword_words) * 4
+
+        if is_trigger_query:
+            if 'trigger' in keyword_words:
                 score += 15 
-            if any(word in clean_query_words for word in ['app', 'mobile', 'cloud']):
-                if any(word in doc['keywords'] for word in ['mobile', 'app', 'push', 'cloud']):
-                    score += 10
+            if is_mobile_query and not keyword_words.isdisjoint(MOBILE_DOC_KEYWORDS):
+                score += 10
 
-        if any(word in clean_query_words for word in ['not', 'troubleshoot', 'debug', 'help', 'issue']):
-            if any(word in doc['keywords'] for word in ['troubleshoot', 'not', 'working', 'debug']):
-                score += 8
+        if is_troubleshoot_query and not keyword_words.isdisjoint(TROUBLESHOOT_DOC_KEYWORDS):
+            score += 8
 
         if score > 0:
             scored_docs.append((score, doc))
 
-    scored_docs.sort(reverse=True, key=lambda x: x[0])
-    results = [doc for score, doc in scored_docs[:limit]]
+    results = [doc for score, doc in nlargest(limit, scored_docs, key=lambda x: x[0])]
 
     logger.info(f"Help docs search (fallback): '{query}' -> found {len(results)} results")
     return results
 
+# Main API reference pages with working endpoint URLs
+API_DOCS = [
+    {"title": "Blueshift API Documentation - Overview", "url": "https://developer.blueshift.com/reference/welcome", "keywords": ["api", "developer", "documentation", "reference", "guide", "overview"]},
+    {"title": "Events API - POST /api/v1/event", "url": "https://developer.blueshift.com/reference/post_api-v1-event", "keywords": ["events", "api", "custom", "attribute", "user", "tracking", "data", "event"]},
+    {"title": "Customer API - POST /api/v1/customers", "url": "https://developer.blueshift.com/reference/post_api-v1-customers", "keywords": ["customer", "user", "profile", "custom", "attribute", "identify", "customers"]},
+    {"title": "Customer Search API - GET /api/v1/customers", "url": "https://developer.blueshift.com/reference/get_api-v1-customers", "keywords": ["customer", "search", "user", "profile", "lookup"]},
+    {"title": "Campaigns API - GET /api/v1/campaigns", "url": "https://developer.blueshift.com/reference/get_api-v1-campaigns", "keywords": ["campaigns", "api", "messaging", "email", "push", "sms"]},
+    {"title": "Catalog API - POST /api/v1/catalog", "url": "https://developer.blueshift.com/reference/post_api-v1-catalog", "keywords": ["catalog", "products", "recommendations", "data"]},
+]
+
+# BM25 index over the static help/API doc titles and keywords
+BM25_K1 = 1.2
+BM25_B = 0.75
+DOC_TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+def tokenize_doc_text(text):
+    """Lowercase alphanumeric tokens of a title, keyword list or query"""
+    return DOC_TOKEN_PATTERN.findall(text.lower())
+
+class DocIndex:
+    """In-memory BM25 inverted index over (source, doc) pairs, built once at import"""
+    __slots__ = ('docs', 'sources', 'postings', 'doc_len', 'avgdl', 'idf')
+
+    def __init__(self, sources):
+        self.docs = []
+        self.sources = []
+        postings = defaultdict(list)
+        self.doc_len = []
+        for source, docs in sources.items():
+            for doc in docs:
+                doc_id = len(self.docs)
+                terms = Counter(tokenize_doc_text(doc['title'] + ' ' + ' '.join(doc['keywords'])))
+                for term, tf in terms.items():
+                    postings[term].append((doc_id, tf))
+                self.docs.append(doc)
+                self.sources.append(source)
+                self.doc_len.append(sum(terms.values()))
+        self.postings = dict(postings)
+        self.avgdl = sum(self.doc_len) / len(self.doc_len) if self.doc_len else 0.0
+        n = len(self.docs)
+        self.idf = {term: math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5)) for term, docs in self.postings.items()}
+
+    def search(self, query, limit, source_filter=None):
+        """Top `limit` docs for the query by BM25 score, optionally from one source only"""
+        scores = defaultdict(float)
+        for term, qtf in Counter(tokenize_doc_text(query)).items():
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, tf in self.postings[term]:
+                if source_filter and self.sources[doc_id] != source_filter:
+                    continue
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_len[doc_id] / self.avgdl)
+                scores[doc_id] += qtf * idf * tf * (BM25_K1 + 1) / (tf + norm)
+        # Ties keep corpus order
+        top = nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [self.docs[doc_id] for doc_id, score in top]
+
+# API docs only - help docs have their own word index above, and mixing them in would skew the API docs' IDF
+API_DOC_INDEX = DocIndex({'api': API_DOCS})
+
+@ttl_cached(SEARCH_RESULT_CACHE, SEARCH_RESULT_CACHE_LOCK)
 def search_blueshift_api_docs(query, limit=3):
-    """Search Blueshift API documentation (kept same)"""
+    """Search Blueshift API documentation (BM25 over the API doc index)"""
     try:
-        # Search the main API reference page with working endpoint URLs
-        api_docs = [
-            {"title": "Blueshift API Documentation - Overview", "url": "https://developer.blueshift.com/reference/welcome", "keywords": ["api", "developer", "documentation", "reference", "guide", "overview"]},
-            {"title": "Events API - POST /api/v1/event", "url": "https://developer.blueshift.com/reference/post_api-v1-event", "keywords": ["events", "api", "custom", "attribute", "user", "tracking", "data", "event"]},
-            {"title": "Customer API - POST /api/v1/customers", "url": "https://developer.blueshift.com/reference/post_api-v1-customers", "keywords": ["customer", "user", "profile", "custom", "attribute", "identify", "customers"]},
-            {"title": "Customer Search API - GET /api/v1/customers", "url": "https://developer.blueshift.com/reference/get_api-v1-customers", "keywords": ["customer", "search", "user", "profile", "lookup"]},
-            {"title": "Campaigns API - GET /api/v1/campaigns", "url": "https://developer.blueshift.com/reference/get_api-v1-campaigns", "keywords": ["campaigns", "api", "messaging", "email", "push", "sms"]},
-            {"title": "Catalog API - POST /api/v1/catalog", "url": "https://developer.blueshift.com/reference/post_api-v1-catalog", "keywords": ["catalog", "products", "recommendations", "data"]},
-        ]
-
-        query_lower = query.lower()
-        query_words = set(query_lower.split())
-
-        # Score based on keyword matching
-        scored_docs = []
-        for doc in api_docs:
-            score = 0
-
-            # Title matching
-            title_words = set(doc['title'].lower().split())
-            title_matches = query_words.intersection(title_words)
-            score += len(title_matches) * 5
-
-            # Keyword matching
-            keyword_words = set(' '.join(doc['keywords']).lower().split())
-            keyword_matches = query_words.intersection(keyword_words)
-            score += len(keyword_matches) * 3
-
-            # Special scoring for specific terms
-            if any(word in query_lower for word in ['custom', 'attribute']):
-                if 'attribute' in doc['keywords']:
-                    score += 10
-
-            if 'api' in query_lower:
-                if 'api' in doc['keywords']:
-                    score += 5
-
-            if score > 0:
-                scored_docs.append((score, doc))
-
-        # Sort by score and return top results
-        scored_docs.sort(reverse=True, key=lambda x: x[0])
-        results = [{"title": doc['title'], "url": doc['url']} for score, doc in scored_docs[:limit]]
+        results = [{"title": doc['title'], "url": doc['url']} for doc in API_DOC_INDEX.search(query, limit)]
 
         logger.info(f"Blueshift API docs search: '{query}' -> found {len(results)} results")
         return results
@@ -1008,43 +1383,150 @@ def search_blueshift_api_docs(query, limit=3):
         logger.error(f"Blueshift API docs search error: {e}")
         return []
 
+# --- Per-query result caches (normalized query text -> result) ---
+# Full /query payloads for 5 minutes, resources for 15; the Athena SQL suggestion only depends on the query, so 1 hour
+QUERY_RESPONSE_CACHE = TTLCache(maxsize=512, ttl=300)
+RELATED_RESOURCES_CACHE = TTLCache(maxsize=256, ttl=900)
+ATHENA_INSIGHTS_CACHE = TTLCache(maxsize=256, ttl=3600)
+QUERY_RESULT_CACHE_LOCK = threading.Lock()
+
+def query_cache_key(query):
+    """Normalized cache key for a query: lowercased, whitespace runs collapsed"""
+    return ' '.join(query.lower().split())
+
+def get_cached_query_result(cache, query):
+    """Look up a cached result for a query (case and extra whitespace ignored)"""
+    with QUERY_RESULT_CACHE_LOCK:
+        return cache.get(query_cache_key(query))
+
+def set_cached_query_result(cache, query, result):
+    """Store a result for a query under its normalized key"""
+    with QUERY_RESULT_CACHE_LOCK:
+        cache[query_cache_key(query)] = result
+
 # --- FIX 4: Robust fetch_help_doc_content with BeautifulSoup Fallback (Kept same) ---
+# Page chrome removed before extraction, and the elements whose text is kept
+HELP_DOC_STRIP_TAGS = ('script', 'style', 'nav', 'header', 'footer', 'aside', 'form')
+HELP_DOC_TEXT_TAGS = ('h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'li')
+HELP_DOC_STRIP_SELECTOR = ', '.join(HELP_DOC_STRIP_TAGS)
+HELP_DOC_TEXT_SELECTOR = ', '.join(HELP_DOC_TEXT_TAGS)
+
+# Main-content containers on help doc pages, in priority order
+HELP_DOC_CONTENT_SELECTORS = ('article .article-body', '.article-content', 'article')
+HELP_DOC_COMPILED_SELECTORS = tuple(soupsieve.compile(sel) for sel in HELP_DOC_CONTENT_SELECTORS) if soupsieve else ()
+
+# Cap on raw HTML read per help doc page (bounds download and parse cost for very long articles)
+HELP_DOC_MAX_BYTES = 256 * 1024
+# Overall wait for a query's help doc fetches - one SEARCH_HTTP_RETRY attempt pair fits inside it (~22.5s)
+HELP_DOC_FETCH_TIMEOUT_SECONDS = 25
+
+# Regex fallback when no HTML parser is installed: scripts/styles are dropped, other tags become a space (one pass)
+HTML_STRIP_RE = re.compile(r'(<script[^>]*>.*?</script>|<style[^>]*>.*?</style>)|<[^>]+>', re.DOTALL | re.IGNORECASE)
+WHITESPACE_RE = re.compile(r'\s+')
+# Whitespace around/between lines of extracted text: strips every line and drops blank ones in one pass
+BLANK_LINES_RE = re.compile(r'\s*\n\s*')
+
+# Extracted page text keyed by (url, max_content_length); 1 hour TTL
+HELP_DOC_CONTENT_CACHE = TTLCache(maxsize=512, ttl=3600)
+HELP_DOC_CONTENT_CACHE_LOCK = threading.Lock()
+
+def _extract_text_lexbor(html):
+    """Extract structured text from a help doc page using selectolax's Lexbor parser"""
+    tree = LexborHTMLParser(html)
+
+    # Remove unwanted elements
+    for node in tree.css(HELP_DOC_STRIP_SELECTOR):
+        node.decompose()
+
+    # Find main content using common selectors (checked in priority order, not document order)
+    main_content = None
+    for selector in HELP_DOC_CONTENT_SELECTORS:
+        main_content = tree.css_first(selector)
+        if main_content is not None:
+            break
+    main_content = main_content or tree.body or tree.root
+
+    # Extract text with structure
+    parts = []
+    for element in main_content.css(HELP_DOC_TEXT_SELECTOR):
+        text = element.text(strip=True)
+        if text and len(text) > 15:
+            if element.tag.startswith('h'):
+                parts.append(f"\n[HEADING] {text}\n")
+            else:
+                parts.append(f"{text}\n")
+    return ''.join(parts)
+
 def fetch_help_doc_content_improved(url, max_content_length=2000):
+    """Cached wrapper around _fetch_help_doc_content - only non-empty extractions are memoized"""
+    cache_key = (url, max_content_length)
+    with HELP_DOC_CONTENT_CACHE_LOCK:
+        cached = HELP_DOC_CONTENT_CACHE.get(cache_key)
+    if cached is not None:
+        logger.info(f"Using cached content for: {url}")
+        return cached
+
+    content = _fetch_help_doc_content(url, max_content_length)
+    if content:
+        with HELP_DOC_CONTENT_CACHE_LOCK:
+            HELP_DOC_CONTENT_CACHE[cache_key] = content
+    return content
+
+def _fetch_help_doc_content(url, max_content_length=2000):
     """Improved content fetching with fallback for missing BeautifulSoup"""
     try:
         logger.info(f"Fetching content from: {url}")
 
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
+        # Stream the body and stop after HELP_DOC_MAX_BYTES - only the first few KB of text is ever used
+        with HELP_DOC_SESSION.get(url, timeout=SEARCH_REQUEST_TIMEOUT, stream=True) as response:
+            if response.status_code != 200:
+                logger.warning(f"Failed to fetch {url}: Status {response.status_code}")
+                return ""
+            raw_html = response.raw.read(HELP_DOC_MAX_BYTES, decode_content=True)
+            html = raw_html.decode(response.encoding or 'utf-8', errors='replace')
 
-        response = requests.get(url, timeout=15, headers=headers)
-        if response.status_code != 200:
-            logger.warning(f"Failed to fetch {url}: Status {response.status_code}")
-            return ""
+        if LexborHTMLParser is not None:
+            text_content = _extract_text_lexbor(html)
+            clean_content = BLANK_LINES_RE.sub('\n', text_content).strip()
+
+            if len(clean_content) > max_content_length:
+                clean_content = clean_content[:max_content_length] + "...[truncated]"
+
+            logger.info(f"Successfully extracted {len(clean_content)} characters using selectolax")
+            return clean_content
 
         try:
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(response.text, 'html.parser')
+            from bs4 import BeautifulSoup, SoupStrainer
+            # Only build the <body> subtree; <head> (meta, inline scripts/styles) is never read
+            soup = BeautifulSoup(html, BS4_PARSER, parse_only=SoupStrainer('body'))
+            if soup.body is None:
+                # Fragment without a <body> tag - parse the whole document instead
+                soup = BeautifulSoup(html, BS4_PARSER)
             
             # Remove unwanted elements
-            for tag in soup(['script', 'style', 'nav', 'header', 'footer', 'aside', 'form']):
+            for tag in soup(HELP_DOC_STRIP_TAGS):
                 tag.decompose()
 
-            # Find main content using common selectors
-            main_content = soup.select_one('article .article-body') or soup.select_one('.article-content') or soup.find('article') or soup.body or soup
+            # Find main content using common selectors (precompiled, checked in priority order)
+            main_content = None
+            for selector in HELP_DOC_COMPILED_SELECTORS:
+                main_content = selector.select_one(soup)
+                if main_content is not None:
+                    break
+            main_content = main_content or soup.body or soup
             
             # Extract text with structure
-            text_content = ""
-            for element in main_content.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'li']):
+            parts = []
+            for element in main_content.find_all(HELP_DOC_TEXT_TAGS):
                 text = element.get_text(strip=True)
                 if text and len(text) > 15:
                     if element.name.startswith('h'):
-                        text_content += f"\n[HEADING] {text}\n"
+                        parts.append(f"\n[HEADING] {text}\n")
                     else:
-                        text_content += f"{text}\n"
+                        parts.append(f"{text}\n")
+            text_content = ''.join(parts)
             
-            clean_content = '\n'.join([line.strip() for line in text_content.split('\n') if line.strip()])
+            clean_content = BLANK_LINES_RE.sub('\n', text_content).strip()
             
             if len(clean_content) > max_content_length:
                 clean_content = clean_content[:max_content_length] + "...[truncated]"
@@ -1057,17 +1539,13 @@ def fetch_help_doc_content_improved(url, max_content_length=2000):
             logger.warning("BeautifulSoup not available - using simple text extraction")
             
             # Basic HTML stripping (not perfect but functional)
-            text = response.text
+            text = html
             
-            # Remove scripts and styles
-            text = re.sub(r'<script[^>]*>.*?</script>', '', text, flags=re.DOTALL | re.IGNORECASE)
-            text = re.sub(r'<style[^>]*>.*?</style>', '', text, flags=re.DOTALL | re.IGNORECASE)
-            
-            # Remove HTML tags
-            text = re.sub(r'<[^>]+>', ' ', text)
+            # Remove scripts, styles and HTML tags
+            text = HTML_STRIP_RE.sub(lambda m: '' if m.group(1) else ' ', text)
             
             # Clean up whitespace
-            text = re.sub(r'\s+', ' ', text).strip()
+            text = WHITESPACE_RE.sub(' ', text).strip()
             
             if len(text) > max_content_length:
                 text = text[:max_content_length] + "...[truncated]"
@@ -1081,80 +1559,137 @@ def fetch_help_doc_content_improved(url, max_content_length=2000):
 # --- END FIX 4 ---
 
 # --- CRITICAL FIX: TRULY LENIENT Validation Function ---
+# Translation table for query tokenizing - "campaigns?" and "campaigns" become the same token
+PUNCTUATION_TO_SPACE = str.maketrans({c: ' ' for c in string.punctuation})
+
+VALIDATION_STOP_WORDS = frozenset({'the', 'a', 'an', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should'})
+
+# Expanded platform terms for better context matching (substring match against lowercased text)
+BLUESHIFT_TERMS = frozenset({'campaign', 'trigger', 'api', 'event', 'customer', 'journey', 'studio', 'message', 'mobile', 'app', 'push', 'zendesk', 'jira', 'confluence', 'facebook', 'audience', 'lookalike', 'syndication', 'integration', 'external', 'fetch', 'optimizer', 'email', 'sms', 'segment', 'webhook', 'personalization', 'recommendation', 'error', 'failed', 'limit', 'channel', 'delivery', 'bounce'})
+BLUESHIFT_TERMS_RE = re.compile('|'.join(re.escape(term) for term in sorted(BLUESHIFT_TERMS)))
+
+
+def build_blueshift_terms_automaton():
+    """Aho-Corasick automaton over BLUESHIFT_TERMS, or None when pyahocorasick is not installed"""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for term in BLUESHIFT_TERMS:
+        automaton.add_word(term, term)
+    automaton.make_automaton()
+    return automaton
+
+
+BLUESHIFT_TERMS_AUTOMATON = build_blueshift_terms_automaton()
+
+
+def has_blueshift_term(content):
+    """True if the (already lowercased) text contains any platform term, in a single pass"""
+    if BLUESHIFT_TERMS_AUTOMATON is not None:
+        return next(BLUESHIFT_TERMS_AUTOMATON.iter(content), None) is not None
+    return BLUESHIFT_TERMS_RE.search(content) is not None
+
+
+LENIENT_VALIDATION_SOURCES = frozenset({"Confluence", "JIRA"})
+
+
 def validate_search_results_improved(query, results, source_name):
     """TRULY LENIENT validation - Accept most results unless entirely irrelevant."""
     if not results:
         return []
 
-    query_lower = query.lower()
-    query_words = set(query.lower().split()) # FIX: ensure the query words are lowercased here
+    query_words = set(query.lower().translate(PUNCTUATION_TO_SPACE).split()) # FIX: ensure the query words are lowercased here
     validated_results = []
 
     # Remove only the most basic stop words - keep more meaningful words
-    stop_words = {'the', 'a', 'an', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should'}
-    clean_query_words = [w for w in query_words if w not in stop_words and len(w) > 2]
+    clean_query_words = [w for w in query_words if w not in VALIDATION_STOP_WORDS and len(w) > 2]
+
+    # Confluence and JIRA results already passed their own relevance scoring - accept them without scanning
+    lenient = source_name in LENIENT_VALIDATION_SOURCES
 
     for result in results:
-        title = result.get('title', '').lower()
         url = result.get('url', '')
-        # Also check description/summary if available
-        description = result.get('description', '').lower()
-        summary = result.get('summary', '').lower()
-        content = f"{title} {description} {summary}".lower()
 
         # Set default to ACCEPT (the core fix)
         should_include = True
 
-        # Check for ANY relevance in title OR content
-        meaningful_matches = len([w for w in clean_query_words if w in content])
-
-        # Special handling for Confluence - be extremely lenient since Confluence search already did relevance filtering
-        if source_name == "Confluence":
-            should_include = True  # Accept all Confluence results since they passed Confluence's own relevance filtering
-        elif source_name == "JIRA":
-            # Be very lenient with JIRA results since they're already scored and filtered
-            should_include = True  # Accept JIRA results that made it through the scoring system
-        elif meaningful_matches == 0:
-            # Expanded platform terms for better context matching
-            blueshift_terms = {'campaign', 'trigger', 'api', 'event', 'customer', 'journey', 'studio', 'message', 'mobile', 'app', 'push', 'zendesk', 'jira', 'confluence', 'facebook', 'audience', 'lookalike', 'syndication', 'integration', 'external', 'fetch', 'optimizer', 'email', 'sms', 'segment', 'webhook', 'personalization', 'recommendation', 'error', 'failed', 'limit', 'channel', 'delivery', 'bounce'}
-            has_blueshift = any(term in content for term in blueshift_terms)
-
-            if not has_blueshift:
+        if not lenient and url:
+            # Also check description/summary if available - lowercase the combined text once
+            content = f"{result.get('title', '')} {result.get('description', '')} {result.get('summary', '')}".lower()
+
+            # Check for ANY relevance in title OR content (stop at the first match), else any platform term
+            if not any(w in content for w in clean_query_words) and not has_blueshift_term(content):
                 should_include = False  # Only reject if truly irrelevant
 
         if should_include and url:  # Must have valid URL
             validated_results.append(result)
-            logger.info(f"✅ {source_name} - Included: {result.get('title', 'Untitled')[:60]}...")
+            logger.debug("✅ %s - Included: %s...", source_name, result.get('title', 'Untitled')[:60])
         else:
-            logger.info(f"❌ {source_name} - Excluded: {result.get('title', 'Untitled')[:60]}...")
+            logger.debug("❌ %s - Excluded: %s...", source_name, result.get('title', 'Untitled')[:60])
             
     logger.info(f"{source_name} validation: {len(results)} → {len(validated_results)} results")
     return validated_results
 # --- END CRITICAL FIX ---
 
+# Phrases that suggest a resource contains step-by-step instructions (single pass, no lowercased copy)
+STEP_INDICATOR_RE = re.compile(r'step|navigate|click|select|go to', re.IGNORECASE)
+
 def verify_step_extraction(query, resources_with_content):
     """Verify if actual step-by-step instructions exist in the content (kept for completeness)"""
     # This function is not used in the current flow, but kept in case it is reintroduced.
     pass
 
+# Provider searches run for every query: (name, search function, limit, required integration or None)
+SEARCH_PROVIDERS = (
+    ('help_docs', search_help_docs, 4, None),
+    ('confluence', search_confluence_docs_improved, 4, 'confluence'),
+    ('jira', search_jira_tickets_improved, 4, 'jira'),
+    ('zendesk', search_zendesk_tickets_improved, 4, 'zendesk'),
+    ('api_docs', search_blueshift_api_docs, 3, None),
+)
+SEARCH_TIMEOUT_SECONDS = 25
+
+def run_all_searches(query, overall_timeout=SEARCH_TIMEOUT_SECONDS):
+    """Run every enabled provider search concurrently; providers that fail or miss the deadline return []"""
+    futures = {
+        _IO_POOL.submit(search, query, limit=limit): name
+        for name, search, limit, service in SEARCH_PROVIDERS
+        if service is None or service in ENABLED_SERVICES
+    }
+    done, not_done = wait(futures, timeout=overall_timeout)
+    for future in not_done:
+        future.cancel()
+        logger.warning(f"{futures[future]} search timed out after {overall_timeout}s")
+
+    results = {name: [] for name, _, _, _ in SEARCH_PROVIDERS}
+    for future in done:
+        try:
+            results[futures[future]] = future.result()
+        except Exception as e:
+            logger.error(f"{futures[future]} search failed: {e}")
+    return results
+
 # --- FIX 5: Update Main Resource Generation Function (Kept same, calls updated searches) ---
 def generate_related_resources_improved(query):
     """Improved resource generation with better validation and search calls"""
+    cached = get_cached_query_result(RELATED_RESOURCES_CACHE, query)
+    if cached is not None:
+        logger.info(f"⚡ Using cached resources for: '{query}'")
+        return cached
+
     logger.info(f"🔍 Searching for resources: '{query}'")
 
-    # Perform searches with restored/improved functions
-    help_docs = validate_search_results_improved(query, search_help_docs(query, limit=4), "Help Docs")
-    
-    # We apply validation manually on the Confluence raw results for troubleshooting,
-    # then include them all if they were found (to debug the Confluence validation step)
-    confluence_raw = search_confluence_docs_improved(query, limit=4)
+    # Perform searches with restored/improved functions - all providers at once, so the wait is the slowest one
+    raw_results = run_all_searches(query)
+    help_docs = validate_search_results_improved(query, raw_results['help_docs'], "Help Docs")
+
     # FIX: Confluence validation is now run, but because the base filter is so strict, 
     # we rely on it now being correctly filtered.
-    confluence_docs = validate_search_results_improved(query, confluence_raw, "Confluence")
+    confluence_docs = validate_search_results_improved(query, raw_results['confluence'], "Confluence")
 
-    jira_tickets = validate_search_results_improved(query, search_jira_tickets_improved(query, limit=4), "JIRA")
-    support_tickets = validate_search_results_improved(query, search_zendesk_tickets_improved(query, limit=4), "Zendesk")
-    api_docs = validate_search_results_improved(query, search_blueshift_api_docs(query, limit=3), "API Docs")
+    jira_tickets = validate_search_results_improved(query, raw_results['jira'], "JIRA")
+    support_tickets = validate_search_results_improved(query, raw_results['zendesk'], "Zendesk")
+    api_docs = validate_search_results_improved(query, raw_results['api_docs'], "API Docs")
 
     logger.info(f"📊 Final counts: Help={len(help_docs)}, Confluence={len(confluence_docs)}, JIRA={len(jira_tickets)}, Zendesk={len(support_tickets)}, API={len(api_docs)}")
 
@@ -1197,24 +1732,39 @@ def generate_related_resources_improved(query):
             logger.info(f"✅ Added Zendesk ticket with full details: {ticket['title']}")
 
     # PRIORITY 2: Help docs and API docs for content fetching (only if not specific ticket lookup)
+    # (source, doc) pairs, tagged here so the results below don't need list membership scans
     if not zendesk_tickets_with_details:
-        priority_resources = help_docs[:2] + api_docs[:2] + confluence_docs[:1]
+        priority_resources = [('help_docs', doc) for doc in help_docs[:2]] + [('api_docs', doc) for doc in api_docs[:2]] + [('confluence', doc) for doc in confluence_docs[:1]]
     else:
         # If we have specific ticket, reduce other resources
-        priority_resources = help_docs[:1] + api_docs[:1]
-
-    # Use the improved content fetching function
-    for doc in priority_resources:
-        if doc.get('url'):
-            content = fetch_help_doc_content_improved(doc['url'])
-            if content and len(content.strip()) > 50:  # Must have meaningful content
-                resources_with_content.append({
-                    'title': doc['title'],
-                    'url': doc['url'],
-                    'content': content,
-                    'source': 'help_docs' if doc in help_docs else ('confluence' if doc in confluence_docs else 'api_docs')
-                })
-                logger.info(f"✅ Fetched content: {doc['title'][:60]}... ({len(content)} chars)")
+        priority_resources = [('help_docs', doc) for doc in help_docs[:1]] + [('api_docs', doc) for doc in api_docs[:1]]
+
+    # Use the improved content fetching function - URLs are fetched concurrently, results kept in priority order
+    # (a URL listed by more than one source is only fetched once, for its first occurrence)
+    fetched_urls = set()
+    docs_to_fetch = []
+    for source, doc in priority_resources:
+        if doc.get('url') and doc['url'] not in fetched_urls:
+            fetched_urls.add(doc['url'])
+            docs_to_fetch.append((source, doc))
+    # Bounded like run_all_searches: a fetch that misses the deadline is cancelled and counts as no content
+    fetch_futures = [_IO_POOL.submit(fetch_help_doc_content_improved, doc['url']) for _, doc in docs_to_fetch]
+    _, not_done = wait(fetch_futures, timeout=HELP_DOC_FETCH_TIMEOUT_SECONDS)
+    for future in not_done:
+        future.cancel()
+    if not_done:
+        logger.warning(f"{len(not_done)} help doc fetches timed out after {HELP_DOC_FETCH_TIMEOUT_SECONDS}s")
+    fetched_contents = ['' if future in not_done else future.result() for future in fetch_futures]
+
+    for (source, doc), content in zip(docs_to_fetch, fetched_contents):
+        if has_meaningful_content(content):
+            resources_with_content.append({
+                'title': doc['title'],
+                'url': doc['url'],
+                'content': content,
+                'source': source
+            })
+            logger.info("✅ Fetched content: %s... (%d chars)", doc['title'][:60], len(content))
 
     # Add JIRA tickets
     for ticket in jira_tickets[:2]:
@@ -1241,7 +1791,7 @@ def generate_related_resources_improved(query):
 
     logger.info(f"📄 Resources with content: {len(resources_with_content)}")
 
-    return {
+    related_resources = {
         'help_docs': help_docs,
         'confluence_docs': confluence_docs,
         'jira_tickets': jira_tickets,
@@ -1249,6 +1799,10 @@ def generate_related_resources_improved(query):
         'api_docs': api_docs,
         'platform_resources_with_content': resources_with_content
     }
+    # Don't pin an empty result (e.g. every backend timed out) for the whole TTL
+    if resources_with_content:
+        set_cached_query_result(RELATED_RESOURCES_CACHE, query, related_resources)
+    return related_resources
 # --- END FIX 5 ---
 
 def get_athena_client():
@@ -1260,6 +1814,8 @@ def get_athena_client():
         print(f"Error initializing Athena client: {e}")
         return None
 
+ATHENA_POLL_TIMEOUT_SECONDS = 60
+
 def query_athena(query_string, database_name, query_description="Athena query"):
     """Execute a query on AWS Athena and return results"""
     # NOTE: This function is not used for the AI workflow, only for manual user data lookup.
@@ -1277,15 +1833,17 @@ def query_athena(query_string, database_name, query_description="Athena query"):
 
         query_execution_id = response['QueryExecutionId']
 
-        # Wait for query to complete
-        max_attempts = 30  # Wait up to 30 seconds
-        for attempt in range(max_attempts):
+        # Wait for query to complete - poll with exponential backoff (50ms, 75ms, ... capped at 2s)
+        deadline = time.monotonic() + ATHENA_POLL_TIMEOUT_SECONDS
+        attempt = 0
+        while True:
             result = athena_client.get_query_execution(QueryExecutionId=query_execution_id)
             status = result['QueryExecution']['Status']['State']
 
-            if status in ['SUCCEEDED', 'FAILED', 'CANCELLED']:
+            if status in ['SUCCEEDED', 'FAILED', 'CANCELLED'] or time.monotonic() >= deadline:
                 break
-            time.sleep(1)
+            time.sleep(min(2.0, 0.05 * (1.5 ** attempt)))
+            attempt += 1
 
         if status != 'SUCCEEDED':
             status_details = result['QueryExecution']['Status']
@@ -1313,13 +1871,8 @@ def query_athena(query_string, database_name, query_description="Athena query"):
         # Extract column headers
         columns = [col['VarCharValue'] for col in rows[0]['Data']]
 
-        # Extract data rows
-        data = []
-        for row in rows[1:]:  # Skip header row
-            row_data = {}
-            for i, col in enumerate(row['Data']):
-                row_data[columns[i]] = col.get('VarCharValue', '')
-            data.append(row_data)
+        # Extract data rows (skip header row)
+        data = [dict(zip(columns, (col.get('VarCharValue', '') for col in row['Data']))) for row in rows[1:]]
 
         return {"data": data, "columns": columns}
 
@@ -1328,35 +1881,34 @@ def query_athena(query_string, database_name, query_description="Athena query"):
         print(f"Query was: {query_string}")
         return {"error": str(e), "data": []}
 
+# Placeholder rewrites for generated SQL, applied in a single pass by customize_query_for_execution
+UUID_RE = re.compile(r'[a-fA-F0-9]{8}-[a-fA-F0-9]{4}-[a-fA-F0-9]{4}-[a-fA-F0-9]{4}-[a-fA-F0-9]{12}')
+SQL_PLACEHOLDER_RE = re.compile(
+    r"(?P<field>user_uuid|campaign_uuid|trigger_uuid) = '[^']*'"
+    r"|file_date (?P<op>>=|<) '[0-9]{4}-[0-9]{1,2}-[0-9]{1,2}'"
+    r"|" + UUID_RE.pattern
+)
+FILE_DATE_PLACEHOLDERS = {'>=': "file_date >= '2024-12-01'", '<': "file_date < '2024-12-15'"}
+PLACEHOLDER_FIELDS = ('user_uuid', 'campaign_uuid', 'trigger_uuid')
+
 def customize_query_for_execution(sql_query, user_query):
     """Keep the query as a template with placeholder values - do not substitute real data"""
-
-    # Keep placeholder values for account UUIDs and other sensitive data
-    # Replace any real UUIDs that might have been inserted with placeholders
-    import re
-
-    # Replace any real UUID patterns with placeholder text
-    uuid_pattern = r'[a-fA-F0-9]{8}-[a-fA-F0-9]{4}-[a-fA-F0-9]{4}-[a-fA-F0-9]{4}-[a-fA-F0-9]{12}'
-    customized = re.sub(uuid_pattern, 'client_account_uuid', sql_query)
-
-    # Ensure placeholder values are used for common fields
-    customized = customized.replace('11d490bf-b250-4749-abf4-b6197620a985', 'client_account_uuid')
-
-    # Use example placeholder dates instead of real dates - fix pattern matching
-    import re
-    # Replace file_date patterns with fixed example date
-    customized = re.sub(r"file_date >= '[0-9]{4}-[0-9]{1,2}-[0-9]{1,2}'", "file_date >= '2024-12-01'", customized)
-    customized = re.sub(r"file_date < '[0-9]{4}-[0-9]{1,2}-[0-9]{1,2}'", "file_date < '2024-12-15'", customized)
-
-    # Ensure other sensitive fields use placeholders
-    if 'user_uuid' in customized and 'client_user_uuid' not in customized:
-        customized = re.sub(r"user_uuid = '[^']*'", "user_uuid = 'client_user_uuid'", customized)
-    if 'campaign_uuid' in customized and 'client_campaign_uuid' not in customized:
-        customized = re.sub(r"campaign_uuid = '[^']*'", "campaign_uuid = 'client_campaign_uuid'", customized)
-    if 'trigger_uuid' in customized and 'client_trigger_uuid' not in customized:
-        customized = re.sub(r"trigger_uuid = '[^']*'", "trigger_uuid = 'client_trigger_uuid'", customized)
-
-    return customized
+    # Fields whose client_* placeholder is already present keep their value (only raw UUIDs in it are masked)
+    keep_fields = {field for field in PLACEHOLDER_FIELDS if f'client_{field}' in sql_query}
+
+    def placeholder(match):
+        field = match.group('field')
+        if field:
+            if field in keep_fields:
+                return UUID_RE.sub('client_account_uuid', match.group(0))
+            return f"{field} = 'client_{field}'"
+        if match.group('op'):
+            # Use example placeholder dates instead of real dates
+            return FILE_DATE_PLACEHOLDERS[match.group('op')]
+        # Replace any real UUIDs that might have been inserted with placeholders
+        return 'client_account_uuid'
+
+    return SQL_PLACEHOLDER_RE.sub(placeholder, sql_query)
 
 def get_available_tables(database_name):
     """Get list of available tables in the database - returns hardcoded list to avoid S3 permission issues"""
@@ -1432,8 +1984,7 @@ def sample_message_patterns(user_query, database_name, timeout_seconds=5):
     """
     try:
         # Extract key terms from user query
-        STOP_WORDS = {'why', 'is', 'my', 'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'how', 'what', 'when', 'where', 'who'}
-        words = [w for w in user_query.lower().split() if len(w) > 2 and w.lower() not in STOP_WORDS]
+        words = clean_search_words(user_query.lower().split())
 
         if not words:
             return None
@@ -1464,7 +2015,6 @@ def sample_message_patterns(user_query, database_name, timeout_seconds=5):
         """
 
         # Add timeout wrapper using threading
-        import threading
         result_container = [None]
         error_container = [None]
 
@@ -1500,7 +2050,6 @@ def sample_message_patterns(user_query, database_name, timeout_seconds=5):
                 for msg in messages:
                     if search_term.lower() in msg.lower():
                         # Find the actual casing used in the message
-                        import re
                         pattern = re.search(rf'\b\w*{search_term}\w*\b', msg, re.IGNORECASE)
                         if pattern:
                             actual_term = pattern.group(0)
@@ -1518,16 +2067,15 @@ def sample_message_patterns(user_query, database_name, timeout_seconds=5):
 
 def generate_athena_insights(user_query):
     """Generate data insights using Athena queries based on user query with improved relevance"""
-    try:
-        # Same stop words filtering as other searches
-        STOP_WORDS = {'why', 'is', 'my', 'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'how', 'what', 'when', 'where', 'who'}
+    cached = get_cached_query_result(ATHENA_INSIGHTS_CACHE, user_query)
+    if cached is not None:
+        logger.info(f"⚡ Using cached Athena insights for: '{user_query}'")
+        return cached
 
-        def clean_words(words):
-            return [w for w in words if len(w) > 2 and w.lower() not in STOP_WORDS]
-
-        # Extract key terms from user query
+    try:
+        # Extract key terms from user query (same stop words filtering as other searches)
         words = user_query.strip().split()
-        clean_query_words = clean_words(words)
+        clean_query_words = clean_search_words(words)
         if not clean_query_words:
             clean_query_words = words
 
@@ -1539,15 +2087,13 @@ def generate_athena_insights(user_query):
         table_list = ', '.join(available_tables[:20]) if available_tables else "customer_campaign_logs.campaign_execution_v3"
 
         # Extract UUIDs from user query if provided
-        import re
-        uuid_pattern = r'[a-fA-F0-9]{8}-[a-fA-F0-9]{4}-[a-fA-F0-9]{4}-[a-fA-F0-9]{4}-[a-fA-F0-9]{12}'
-        found_uuids = re.findall(uuid_pattern, user_query)
+        found_uuids = UUID_RE.findall(user_query)
 
         uuid_context = ""
         if found_uuids:
             uuid_context = f"\n\nUUIDs FOUND IN USER QUERY:\n"
-            for uuid in found_uuids:
-                uuid_context += f"- {uuid}\n"
+            for campaign_uuid in found_uuids:
+                uuid_context += f"- {campaign_uuid}\n"
             uuid_context += "Include these specific UUIDs in the query (use as user_uuid, campaign_uuid, or account_uuid based on context).\n"
             logger.info(f"Found UUIDs in query: {found_uuids}")
 
@@ -1556,8 +2102,7 @@ def generate_athena_insights(user_query):
 
         # Use cache-only pattern matching for instant response
         actual_pattern = None
-        STOP_WORDS = {'why', 'is', 'my', 'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'how', 'what', 'when', 'where', 'who'}
-        words = [w for w in user_query.lower().split() if len(w) > 2 and w.lower() not in STOP_WORDS]
+        words = clean_search_words(user_query.lower().translate(PUNCTUATION_TO_SPACE).split())
 
         # Check cache for instant pattern matching
         for word in words:
@@ -1619,7 +2164,7 @@ select timestamp, user_uuid, campaign_uuid, trigger_uuid, message, log_level
 from customer_campaign_logs.campaign_execution_v3
 where account_uuid = 'client_account_uuid'
 and campaign_uuid = 'client_campaign_uuid'
-and message like '%{feature_pattern}%'
+and message like '%{{feature_pattern}}%'
 and file_date >= '2024-12-01'
 and file_date < '2024-12-15'
 order by timestamp asc
@@ -1636,7 +2181,7 @@ select
 from customer_campaign_logs.campaign_execution_v3
 where account_uuid = 'client_account_uuid'
 and campaign_uuid = 'client_campaign_uuid'
-and message like '%{error_pattern}%'
+and message like '%{{error_pattern}}%'
 and file_date >= '2024-12-01'
 and file_date < '2024-12-15'
 group by file_date, log_level
@@ -1754,58 +2299,47 @@ INSIGHT_EXPLANATION:
         ai_response = call_gemini_api(query=analysis_prompt, platform_resources=None, temperature=0.0)
         # --- End Gemini API call ---
 
-        if ai_response.startswith("Error:"):
+        if ai_response.startswith(("API Error", "Error:")):
             logger.error(f"Athena AI API error: {ai_response}")
             return get_default_athena_insights(user_query)
 
         logger.info(f"Athena AI response: {ai_response[:200]}...")
-        return parse_athena_analysis(ai_response, user_query)
+        insights = parse_athena_analysis(ai_response, user_query)
+        if insights is None:
+            return get_default_athena_insights(user_query)
+        # Only cache successful AI generations - defaults are retried on the next request
+        set_cached_query_result(ATHENA_INSIGHTS_CACHE, user_query, insights)
+        return insights
 
     except Exception as e:
         logger.error(f"Athena insights generation error: {e}")
         return get_default_athena_insights(user_query)
 
+# Section headings in the Athena AI response; text after a heading on the same line is ignored
+ATHENA_SECTION_RE = re.compile(
+    r'^[ \t]*(DATABASE|SQL_QUERY|INSIGHT_EXPLANATION):[^\n]*\n?(.*?)(?=^[ \t]*(?:DATABASE|SQL_QUERY|INSIGHT_EXPLANATION):|\Z)',
+    re.MULTILINE | re.DOTALL
+)
+MARKDOWN_FENCE_RE = re.compile(r'```(?:sql)?')
+
 def parse_athena_analysis(ai_response, user_query):
-    """Parse AI response and execute Athena query"""
+    """Parse AI response and execute Athena query; None if the response holds no usable SQL"""
     try:
-        lines = ai_response.split('\n')
         database_name = ATHENA_DATABASES[0]  # Default to first database
-        sql_query = ""
-        explanation = ""
-
-        in_database_section = False
-        in_sql_section = False
-        in_explanation_section = False
-
-        for line in lines:
-            line = line.strip()
-            if line.startswith('DATABASE:'):
-                in_database_section = True
-                in_sql_section = False
-                in_explanation_section = False
-                continue
-            elif line.startswith('SQL_QUERY:'):
-                in_database_section = False
-                in_sql_section = True
-                in_explanation_section = False
-                continue
-            elif line.startswith('INSIGHT_EXPLANATION:'):
-                in_database_section = False
-                in_sql_section = False
-                in_explanation_section = True
-                continue
 
-            if in_database_section and line:
-                # Check if the suggested database is in our list
-                if line in ATHENA_DATABASES:
-                    database_name = line
-            elif in_sql_section and line:
-                # Clean up markdown formatting
-                cleaned_line = line.replace('```sql', '').replace('```', '').strip()
-                if cleaned_line:  # Only add non-empty lines
-                    sql_query += cleaned_line + "\n"
-            elif in_explanation_section and line:
-                explanation += line + "\n"
+        # Collect the non-empty lines under each section heading (sections may repeat or come in any order)
+        sections = defaultdict(list)
+        for match in ATHENA_SECTION_RE.finditer(ai_response):
+            sections[match.group(1)].extend(filter(None, map(str.strip, match.group(2).split('\n'))))
+
+        for line in sections['DATABASE']:
+            # Check if the suggested database is in our list
+            if line in ATHENA_DATABASES:
+                database_name = line
+
+        # Clean up markdown formatting, keeping only non-empty lines
+        sql_query = '\n'.join(filter(None, (MARKDOWN_FENCE_RE.sub('', line).strip() for line in sections['SQL_QUERY'])))
+        explanation = '\n'.join(sections['INSIGHT_EXPLANATION'])
 
         # Validate and refine the query before returning
         if sql_query.strip():
@@ -1828,11 +2362,11 @@ def parse_athena_analysis(ai_response, user_query):
                     'has_data': False
                 }
         else:
-            return get_default_athena_insights(user_query)
+            return None
 
     except Exception as e:
         print(f"Error parsing Athena analysis: {e}")
-        return get_default_athena_insights(user_query)
+        return None
 
 def validate_and_test_query(sql_query, database_name, user_query, explanation):
     """Validate the query by testing it with a small sample and return refined version with actual results"""
@@ -1849,7 +2383,6 @@ def validate_and_test_query(sql_query, database_name, user_query, explanation):
             test_query += "\nlimit 10"
         else:
             # Replace any large limits with 10 for testing
-            import re
             test_query = re.sub(r'limit\s+\d+', 'limit 10', test_query, flags=re.IGNORECASE)
 
         logger.info(f"Testing query: {test_query[:200]}...")
@@ -1952,7 +2485,8 @@ def login():
         else:
             return jsonify({'success': False, 'error': 'Invalid username or password'})
 
-    return render_template_string(LOGIN_TEMPLATE)
+    # Same for every visitor - revalidated against its ETag, never per-session
+    return precompressed_page_response(LOGIN_PAGE, cache_control='public, no-cache', vary='Accept-Encoding')
 
 @app.route('/identify-agent', methods=['POST'])
 def identify_agent():
@@ -1977,7 +2511,7 @@ def index():
     if not session.get('logged_in'):
         return redirect(url_for('login'))
     is_admin = session.get('is_admin', False)
-    return render_template_string(MAIN_TEMPLATE, is_admin=is_admin)
+    return precompressed_page_response(MAIN_PAGES[bool(is_admin)])
 
 @app.route('/check-admin')
 def check_admin():
@@ -1986,12 +2520,14 @@ def check_admin():
         return jsonify({'is_admin': False})
     return jsonify({'is_admin': session.get('is_admin', False)})
 
+# The favicon URLs aren't cache-busted, so they get a day rather than the static-asset year (ETag/304 after that)
+FAVICON_MAX_AGE_SECONDS = 86400
+
 @app.route('/blueshift-favicon.png')
 def favicon():
     """Serve the Blueshift favicon"""
     try:
-        # Use send_file to correctly serve the file
-        return send_file('blueshift-favicon.png', mimetype='image/png')
+        return send_from_directory(app.root_path, 'blueshift-favicon.png', mimetype='image/png', max_age=FAVICON_MAX_AGE_SECONDS)
     except Exception as e:
         logger.error(f"Error serving favicon: {e}")
         return '', 404
@@ -2000,11 +2536,104 @@ def favicon():
 def favicon_ico():
     """Serve favicon.ico (redirect to PNG)"""
     try:
-        return send_file('blueshift-favicon.png', mimetype='image/png')
+        return send_from_directory(app.root_path, 'blueshift-favicon.png', mimetype='image/png', max_age=FAVICON_MAX_AGE_SECONDS)
     except Exception as e:
         logger.error(f"Error serving favicon.ico: {e}")
         return '', 404
 
+def get_cached_query_response(query, agent_name):
+    """Cached /query payload for a repeated question (logging the activity as usual), or None"""
+    cached = get_cached_query_result(QUERY_RESPONSE_CACHE, query)
+    if cached is not None:
+        logger.info(f"⚡ Using cached response for: '{query}'")
+        log_agent_activity(
+            agent_name=agent_name,
+            query_text=query,
+            response_status='success',
+            resources_found=len(cached['resources'].get('platform_resources_with_content', [])),
+            athena_used=cached['athena_insights'].get('has_data', False) if cached['athena_insights'] else False
+        )
+    return cached
+
+def athena_insights_result(future, query):
+    """Result of a submitted generate_athena_insights, or the defaults if it takes longer than ATHENA_INSIGHTS_TIMEOUT_SECONDS"""
+    try:
+        return future.result(timeout=ATHENA_INSIGHTS_TIMEOUT_SECONDS)
+    except FutureTimeoutError:
+        future.cancel()
+        logger.warning(f"Athena insights timed out after {ATHENA_INSIGHTS_TIMEOUT_SECONDS}s for: '{query}'")
+        return get_default_athena_insights(query)
+
+def answer_query(query, agent_name):
+    """Run the full support pipeline for one query and log it; returns the /query JSON payload"""
+    # DEBUG: Log the query
+    logger.info(f"Processing query: {query}")
+
+    cached = get_cached_query_response(query, agent_name)
+    if cached is not None:
+        return cached
+
+    # Athena insights only depend on the query - start them now so they overlap the searches and the answer
+    athena_future = _ATHENA_POOL.submit(generate_athena_insights, query)
+
+    # --- UPDATE FUNCTION CALL ---
+    # Call improved resource generation function
+    related_resources = generate_related_resources_improved(query)
+    # --- END UPDATE ---
+
+    # DEBUG: Log what content was actually retrieved
+    platform_resources_with_content = related_resources.get('platform_resources_with_content', [])
+    logger.info(f"Retrieved {len(platform_resources_with_content)} resources with content")
+
+    # NEW: Check if any content actually contains step instructions
+    total_step_content = 0
+    for resource in platform_resources_with_content:
+        content = resource.get('content', '')
+        has_steps = STEP_INDICATOR_RE.search(content) is not None
+        if has_steps:
+            total_step_content += 1
+        logger.debug("- %s: %d chars, has_steps: %s", resource['title'], len(content), has_steps)
+
+    logger.info(f"Resources with actual step content: {total_step_content}")
+
+    # Call the new Gemini API function
+    ai_response = call_gemini_api(query, platform_resources_with_content)
+
+    # Check if AI response contains an error
+    is_error = ai_response.startswith("API Error") or ai_response.startswith("Error:")
+    response_status = 'error' if is_error else 'success'
+
+    # Athena insights (started above)
+    athena_insights = athena_insights_result(athena_future, query)
+
+    # Generate suggested follow-up questions
+    suggested_followups = generate_followup_suggestions(query, ai_response) if not is_error else []
+
+    # Log agent activity
+    athena_used = athena_insights.get('has_data', False) if athena_insights else False
+    log_agent_activity(
+        agent_name=agent_name,
+        query_text=query,
+        response_status=response_status,
+        resources_found=len(platform_resources_with_content),
+        athena_used=athena_used
+    )
+
+    # If there's an error, return it in the standard error field format
+    if is_error:
+        return {
+            "error": ai_response  # Return the error message string
+        }
+
+    result = {
+        "response": ai_response,
+        "resources": related_resources,
+        "athena_insights": athena_insights,
+        "suggested_followups": suggested_followups
+    }
+    set_cached_query_result(QUERY_RESPONSE_CACHE, query, result)
+    return result
+
 @app.route('/query', methods=['POST'])
 def handle_query():
     # Check if user is logged in
@@ -2022,66 +2651,8 @@ def handle_query():
         if not query:
             return jsonify({"error": "Please provide a query"})
 
-        # DEBUG: Log the query
-        logger.info(f"Processing query: {query}")
-
-        # --- UPDATE FUNCTION CALL ---
-        # Call improved resource generation function
-        related_resources = generate_related_resources_improved(query)
-        # --- END UPDATE ---
-
-        # DEBUG: Log what content was actually retrieved
-        platform_resources_with_content = related_resources.get('platform_resources_with_content', [])
-        logger.info(f"Retrieved {len(platform_resources_with_content)} resources with content")
-
-        # NEW: Check if any content actually contains step instructions
-        total_step_content = 0
-        for resource in platform_resources_with_content:
-            content = resource.get('content', '')
-            step_indicators = ['step', 'navigate', 'click', 'select', 'go to']
-            has_steps = any(indicator in content.lower() for indicator in step_indicators)
-            if has_steps:
-                total_step_content += 1
-            logger.info(f"- {resource['title']}: {len(content)} chars, has_steps: {has_steps}")
-
-        logger.info(f"Resources with actual step content: {total_step_content}")
-
-        # Call the new Gemini API function
-        ai_response = call_gemini_api(query, platform_resources_with_content)
-
-        # Check if AI response contains an error
-        is_error = ai_response.startswith("API Error") or ai_response.startswith("Error:")
-        response_status = 'error' if is_error else 'success'
-
-        # Generate Athena insights
-        athena_insights = generate_athena_insights(query)
-
-        # Generate suggested follow-up questions
-        suggested_followups = generate_followup_suggestions(query, ai_response) if not is_error else []
-
-        # Log agent activity
         agent_name = session.get('agent_name')  # No fallback - validation ensures this exists
-        athena_used = athena_insights.get('has_data', False) if athena_insights else False
-        log_agent_activity(
-            agent_name=agent_name,
-            query_text=query,
-            response_status=response_status,
-            resources_found=len(platform_resources_with_content),
-            athena_used=athena_used
-        )
-
-        # If there's an error, return it in the standard error field format
-        if is_error:
-            return jsonify({
-                "error": ai_response  # Return the error message string
-            })
-
-        return jsonify({
-            "response": ai_response,
-            "resources": related_resources,
-            "athena_insights": athena_insights,
-            "suggested_followups": suggested_followups
-        })
+        return jsonify(answer_query(query, agent_name))
 
     except Exception as e:
         # Log failed query
@@ -2094,22 +2665,142 @@ def handle_query():
         print(f"Error in handle_query: {e}")
         return jsonify({"error": "An error occurred processing your request"})
 
-@app.route('/followup', methods=['POST'])
-def handle_followup():
-    """Handle follow-up questions"""
-    # Check if user is logged in
+def run_ask_job(job_id, query, agent_name):
+    """Background body of an /ask job - stores the /query payload (or an error) in the job table"""
+    try:
+        result = answer_query(query, agent_name)
+    except Exception as e:
+        logger.error(f"Error in ask job {job_id}: {e}")
+        log_agent_activity(agent_name=agent_name, query_text=query, response_status='error')
+        result = {"error": "An error occurred processing your request"}
+    finish_ask_job(job_id, 'error' if 'error' in result else 'done', result)
+
+@app.route('/ask', methods=['POST'])
+def submit_ask():
+    """Queue a query on the background job pool; poll GET /ask/<job_id> for the result"""
     if not session.get('logged_in'):
         return jsonify({"error": "Authentication required"}), 401
 
-    # Check if agent has identified themselves
     if not session.get('agent_identified') or not session.get('agent_name'):
         return jsonify({"error": "Please identify yourself before making queries"}), 401
 
-    try:
-        data = request.get_json()
-        followup_query = data.get('query', '').strip()
+    data = request.get_json(silent=True) or {}
+    query = data.get('query', '').strip()
+    if not query:
+        return jsonify({"error": "Please provide a query"}), 400
 
-        if not followup_query:
+    agent_name = session.get('agent_name')
+    job_id = create_ask_job(agent_name)
+    _JOB_POOL.submit(run_ask_job, job_id, query, agent_name)
+    return jsonify({"job_id": job_id, "status": "pending"}), 202
+
+@app.route('/ask/<job_id>')
+def poll_ask(job_id):
+    """Status of an /ask job: 202 while it runs, then the same payload /query returns"""
+    if not session.get('logged_in'):
+        return jsonify({"error": "Authentication required"}), 401
+
+    job = get_ask_job(job_id)
+    # Jobs are only visible to the agent who submitted them
+    if not job or job['agent_name'] != session.get('agent_name'):
+        return jsonify({"error": "Unknown job"}), 404
+    if job['status'] == 'pending':
+        return jsonify({"job_id": job_id, "status": "pending"}), 202
+    return jsonify(job['result'])
+
+def sse_event(data, event=None):
+    """Format one Server-Sent Event with a JSON-encoded payload (keeps newlines inside a single data line)"""
+    message = f"data: {json.dumps(data)}\n\n"
+    return f"event: {event}\n{message}" if event else message
+
+@app.route('/query/stream', methods=['POST'])
+def handle_query_stream():
+    """Streaming variant of /query - the answer arrives as SSE chunks, the rest in a final 'done' event"""
+    if not session.get('logged_in'):
+        return jsonify({"error": "Authentication required"}), 401
+
+    if not session.get('agent_identified') or not session.get('agent_name'):
+        return jsonify({"error": "Please identify yourself before making queries"}), 401
+
+    # Question comes in the JSON body (not the URL), so it never reaches the access log
+    query = (request.get_json(silent=True) or {}).get('query', '').strip()
+    agent_name = session.get('agent_name')
+
+    def generate():
+        if not query:
+            yield sse_event({"error": "Please provide a query"}, event='query_error')
+            return
+
+        # A repeated question replays the cached payload: the whole answer as one chunk, then the done event
+        cached = get_cached_query_response(query, agent_name)
+        if cached is not None:
+            yield sse_event(cached['response'])
+            yield sse_event({key: value for key, value in cached.items() if key != 'response'}, event='done')
+            return
+
+        logger.info(f"Processing streamed query: {query}")
+        athena_future = None
+        platform_resources_with_content = []
+        try:
+            athena_future = _ATHENA_POOL.submit(generate_athena_insights, query)
+            related_resources = generate_related_resources_improved(query)
+            platform_resources_with_content = related_resources.get('platform_resources_with_content', [])
+
+            chunks = []
+            for chunk in stream_claude_api(query, platform_resources_with_content):
+                chunks.append(chunk)
+                yield sse_event(chunk)
+
+            ai_response = ''.join(chunks).strip()
+            athena_insights = athena_insights_result(athena_future, query)
+            suggested_followups = generate_followup_suggestions(query, ai_response)
+        except Exception as e:
+            # Same error wording as the buffered /query endpoint; every failure ends the stream with query_error
+            message = str(e) if str(e).startswith(("API Error", "Error:")) else f"Error: {e}"
+            logger.error(f"Streamed query failed: {message}")
+            if athena_future is not None:
+                athena_future.cancel()
+            log_agent_activity(agent_name=agent_name, query_text=query, response_status='error',
+                               resources_found=len(platform_resources_with_content), athena_used=False)
+            yield sse_event({"error": message}, event='query_error')
+            return
+
+        athena_used = athena_insights.get('has_data', False) if athena_insights else False
+        log_agent_activity(agent_name=agent_name, query_text=query, response_status='success',
+                           resources_found=len(platform_resources_with_content), athena_used=athena_used)
+
+        # Same payload shape as answer_query, so /query and /query/stream share cache entries
+        set_cached_query_result(QUERY_RESPONSE_CACHE, query, {
+            "response": ai_response,
+            "resources": related_resources,
+            "athena_insights": athena_insights,
+            "suggested_followups": suggested_followups
+        })
+        yield sse_event({
+            "resources": related_resources,
+            "athena_insights": athena_insights,
+            "suggested_followups": suggested_followups
+        }, event='done')
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/followup', methods=['POST'])
+def handle_followup():
+    """Handle follow-up questions"""
+    # Check if user is logged in
+    if not session.get('logged_in'):
+        return jsonify({"error": "Authentication required"}), 401
+
+    # Check if agent has identified themselves
+    if not session.get('agent_identified') or not session.get('agent_name'):
+        return jsonify({"error": "Please identify yourself before making queries"}), 401
+
+    try:
+        data = request.get_json()
+        followup_query = data.get('query', '').strip()
+
+        if not followup_query:
             return jsonify({"error": "Please provide a follow-up question"})
 
         # Call Gemini API
@@ -2124,6 +2815,38 @@ def handle_followup():
         return jsonify({"error": "An error occurred processing your follow-up"})
 
 
+@app.route('/followup/stream', methods=['POST'])
+def handle_followup_stream():
+    """Streaming variant of /followup - answer chunks as SSE messages, then an empty 'done' event"""
+    if not session.get('logged_in'):
+        return jsonify({"error": "Authentication required"}), 401
+
+    if not session.get('agent_identified') or not session.get('agent_name'):
+        return jsonify({"error": "Please identify yourself before making queries"}), 401
+
+    followup_query = (request.get_json(silent=True) or {}).get('query', '').strip()
+
+    def generate():
+        if not followup_query:
+            yield sse_event({"error": "Please provide a follow-up question"}, event='query_error')
+            return
+        try:
+            for chunk in stream_claude_api(followup_query):
+                yield sse_event(chunk)
+        except Exception as e:
+            logger.error(f"Error in handle_followup_stream: {e}")
+            yield sse_event({"error": "An error occurred processing your follow-up"}, event='query_error')
+            return
+        yield sse_event({}, event='done')
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+# Words left out of the dashboard's top keywords
+DASHBOARD_COMMON_WORDS = frozenset({'how', 'to', 'what', 'is', 'the', 'a', 'an', 'in', 'on', 'for', 'with', 'and', 'or', 'can', 'i', 'do', 'does'})
+DASHBOARD_WORD_RE = re.compile(r'\b\w+\b')
+
 @app.route('/dashboard')
 def dashboard():
     """Agent activity dashboard - Admin only"""
@@ -2143,20 +2866,18 @@ def dashboard():
 
     # Extract top keywords from queries
     keyword_counts = defaultdict(int)
-    common_words = {'how', 'to', 'what', 'is', 'the', 'a', 'an', 'in', 'on', 'for', 'with', 'and', 'or', 'can', 'i', 'do', 'does'}
-
     for query in stats['all_queries']:
-        words = re.findall(r'\b\w+\b', query.lower())
+        words = DASHBOARD_WORD_RE.findall(query.lower())
         for word in words:
-            if len(word) > 3 and word not in common_words:
+            if len(word) > 3 and word not in DASHBOARD_COMMON_WORDS:
                 keyword_counts[word] += 1
 
-    top_keywords = sorted(keyword_counts.items(), key=lambda x: x[1], reverse=True)[:10]
+    top_keywords = nlargest(10, keyword_counts.items(), key=lambda x: x[1])
 
-    return render_template_string(DASHBOARD_TEMPLATE,
-                                   stats=stats,
-                                   top_keywords=top_keywords,
-                                   agent_name=session.get('agent_name', 'Unknown'))
+    return render_template('dashboard.html',
+                           stats=stats,
+                           top_keywords=top_keywords,
+                           agent_name=session.get('agent_name', 'Unknown'))
 
 @app.route('/dashboard/delete-agent', methods=['POST'])
 def delete_agent():
@@ -2186,6 +2907,44 @@ def delete_agent():
         logger.error(f"Error in delete_agent: {e}")
         return jsonify({"error": "Failed to delete agent entries"}), 500
 
+# Every TTL cache of upstream results, with the lock that guards it
+RESPONSE_CACHES = (
+    (QUERY_RESPONSE_CACHE, QUERY_RESULT_CACHE_LOCK),
+    (RELATED_RESOURCES_CACHE, QUERY_RESULT_CACHE_LOCK),
+    (ATHENA_INSIGHTS_CACHE, QUERY_RESULT_CACHE_LOCK),
+    (SEARCH_RESULT_CACHE, SEARCH_RESULT_CACHE_LOCK),
+    (HELP_DOC_CONTENT_CACHE, HELP_DOC_CONTENT_CACHE_LOCK),
+    (CLAUDE_RESPONSE_CACHE, CLAUDE_RESPONSE_CACHE_LOCK),
+)
+
+def flush_response_caches():
+    """Empty every upstream result cache in this worker; returns the number of entries dropped"""
+    flushed = 0
+    for cache, lock in RESPONSE_CACHES:
+        with lock:
+            flushed += len(cache)
+            cache.clear()
+    return flushed
+
+@app.route('/dashboard/flush-cache', methods=['POST'])
+def flush_cache():
+    """Drop cached answers, resources and search results (e.g. after a help doc update) - Admin only"""
+    # Check if user is logged in
+    if not session.get('logged_in'):
+        return jsonify({"error": "Authentication required"}), 401
+
+    # Check if user is admin
+    if not session.get('is_admin', False):
+        return jsonify({"error": "Admin privileges required"}), 403
+
+    flushed = flush_response_caches()
+    logger.info(f"Response caches flushed by admin: {flushed} entries")
+    return jsonify({
+        "success": True,
+        "flushed_count": flushed,
+        "message": f"Flushed {flushed} cached entries (this worker only)"
+    })
+
 @app.route('/dashboard/export')
 def export_queries():
     """Export all query data as CSV - Admin only"""
@@ -2222,1349 +2981,71 @@ def export_queries():
         return "Error exporting data", 500
 
 
-# Exact copy of production HTML with correct styling
-LOGIN_TEMPLATE = '''
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <title>Support Bot - Login</title>
-    <link rel="icon" type="image/png" sizes="32x32" href="/blueshift-favicon.png">
-    <style>
-        body {
-            font-family: Arial, sans-serif;
-            max-width: 400px;
-            margin: 100px auto;
-            padding: 20px;
-            background: #f5f7fa;
-        }
-        .login-form {
-            background: white;
-            padding: 30px;
-            border-radius: 8px;
-            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-        }
-        h1 {
-            text-align: center;
-            margin-bottom: 30px;
-            color: #333;
-            font-size: 24px;
-            font-weight: 600;
-        }
-        .logo {
-            height: 40px;
-            vertical-align: middle;
-            margin-right: 15px;
-        }
-        input {
-            width: 100%;
-            padding: 12px;
-            margin: 10px 0;
-            border: 1px solid #ddd;
-            border-radius: 4px;
-            box-sizing: border-box;
-            font-size: 14px;
-        }
-        button {
-            background-color: #2790FF;
-            color: white;
-            padding: 12px;
-            width: 100%;
-            border: none;
-            border-radius: 4px;
-            cursor: pointer;
-            font-size: 16px;
-            font-weight: 500;
-            transition: background-color 0.3s ease;
-        }
-        button:hover {
-            background-color: #1976d2;
-        }
-        .error {
-            color: #d73527;
-            margin: 10px 0;
-            padding: 10px;
-            background: #ffeaea;
-            border-radius: 4px;
-            display: none;
-        }
-    </style>
-</head>
-<body>
-    <div class="login-form">
-        <h1>
-            <img src="/blueshift-favicon.png" alt="Blueshift" class="logo">
-            Support Bot
-        </h1>
-        <form id="loginForm">
-            <input type="text" id="username" placeholder="Username" required>
-            <input type="password" id="password" placeholder="Password" required>
-            <button type="submit">Login</button>
-        </form>
-
-        <div id="error" class="error"></div>
-    </div>
-
-    <script>
-        document.getElementById('loginForm').addEventListener('submit', function(e) {
-            e.preventDefault();
-
-            const username = document.getElementById('username').value;
-            const password = document.getElementById('password').value;
-            const errorDiv = document.getElementById('error');
-
-            // Send login request to server
-            fetch('/login', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
-                    username: username,
-                    password: password
-                })
-            })
-            .then(response => response.json())
-            .then(data => {
-                if (data.success) {
-                    // Clear any old session data from browser
-                    sessionStorage.clear();
-                    // Redirect to main app
-                    window.location.href = '/';
-                } else {
-                    errorDiv.textContent = data.error || 'Invalid username or password';
-                    errorDiv.style.display = 'block';
-                    setTimeout(() => {
-                        errorDiv.style.display = 'none';
-                    }, 3000);
-                }
-            })
-            .catch(error => {
-                errorDiv.textContent = 'Login failed. Please try again.';
-                errorDiv.style.display = 'block';
-                setTimeout(() => {
-                    errorDiv.style.display = 'none';
-                }, 3000);
-            });
-        });
-
-        // Clear error on input
-        document.getElementById('username').addEventListener('input', function() {
-            document.getElementById('error').style.display = 'none';
-        });
-
-        document.getElementById('password').addEventListener('input', function() {
-            document.getElementById('error').style.display = 'none';
-        });
-    </script>
-</body>
-</html>
-'''
-
-MAIN_TEMPLATE = '''
-<!DOCTYPE html>
-<html>
-<head>
-    <title>Blueshift Support Bot - Interactive</title>
-    <link rel="icon" type="image/png" sizes="32x32" href="/blueshift-favicon.png">
-    <link rel="shortcut icon" href="/favicon.ico">
-    <link rel="apple-touch-icon" sizes="32x32" href="/blueshift-favicon.png">
-    <script src="https://cdn.jsdelivr.net/npm/marked/marked.min.js"></script>
-    <style>
-        body {
-            font-family: 'Calibri', sans-serif;
-            font-size: 10pt;
-            margin: 0;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh;
-        }
-
-        .container {
-            max-width: 1000px;
-            margin: 0 auto;
-            background: white;
-            margin-top: 40px;
-            margin-bottom: 40px;
-            padding: 50px;
-            border-radius: 20px;
-            box-shadow: 0 20px 40px rgba(0,0,0,0.1);
-        }
-
-        h1 {
-            color: #2790FF;
-            margin-bottom: 15px;
-            text-align: center;
-            font-size: 2.5em;
-            font-weight: bold;
-        }
-
-        .search-container {
-            text-align: center;
-            margin-bottom: 40px;
-        }
-
-        input[type="text"] {
-            width: 70%;
-            padding: 18px 25px;
-            border: 2px solid #e1e5e9;
-            border-radius: 50px;
-            font-size: 16px;
-            outline: none;
-            transition: all 0.3s ease;
-            font-family: 'Calibri', sans-serif;
-        }
-
-        input[type="text"]:focus {
-            border-color: #2790FF;
-            box-shadow: 0 0 0 3px rgba(39, 144, 255, 0.1);
-        }
-
-        button {
-            padding: 18px 35px;
-            background: linear-gradient(45deg, #2790FF, #4da6ff);
-            color: white;
-            border: none;
-            border-radius: 50px;
-            font-size: 16px;
-            cursor: pointer;
-            margin-left: 15px;
-            transition: all 0.3s ease;
-            font-weight: 500;
-            font-family: 'Calibri', sans-serif;
-        }
-
-        button:hover {
-            transform: translateY(-2px);
-            box-shadow: 0 8px 20px rgba(39, 144, 255, 0.3);
-        }
-
-        button:disabled {
-            opacity: 0.6;
-            cursor: not-allowed;
-            transform: none;
-        }
-
-        .features {
-            display: grid;
-            grid-template-columns: repeat(4, 1fr);
-            gap: 30px;
-            margin-top: 50px;
-        }
-
-        .feature {
-            background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%);
-            padding: 30px;
-            border-radius: 15px;
-            border-left: 5px solid #2790FF;
-        }
-
-        .feature h3 {
-            color: #2790FF;
-            margin-top: 0;
-            font-size: 1.2em;
-            line-height: 1.3;
-        }
-
-        .feature ul {
-            list-style-type: none;
-            padding: 0;
-        }
-
-        .feature li {
-            padding: 8px 0;
-            border-bottom: 1px solid rgba(39, 144, 255, 0.1);
-        }
-
-        .feature li:before {
-            content: "✓";
-            color: #2790FF;
-            font-weight: bold;
-            margin-right: 10px;
-        }
-
-        .response-section {
-            background: #f8f9fa;
-            border-radius: 15px;
-            padding: 30px;
-            margin: 30px 0;
-            border-left: 5px solid #2790FF;
-            max-height: 400px;
-            overflow-y: auto;
-        }
-
-        .response-section h3 {
-            color: #2790FF;
-            margin-top: 0;
-            font-size: 1.4em;
-        }
-
-        .response-content {
-            line-height: 1.8;
-            color: #555555 !important;
-            font-weight: 400;
-            font-size: 1.05em;
-        }
-
-        .response-content strong {
-            font-weight: 700;
-            color: #2c3e50;
-        }
-
-        .response-content h3 {
-            color: #2790FF;
-            margin-top: 20px;
-            margin-bottom: 10px;
-            font-size: 1.3em;
-        }
-
-        .response-content h4 {
-            color: #2790FF;
-            margin-top: 15px;
-            margin-bottom: 8px;
-            font-size: 1.1em;
-        }
-
-        /* INTERACTIVE FOLLOW-UP SECTION */
-        .followup-section {
-            background: linear-gradient(135deg, #e3f2fd 0%, #bbdefb 100%);
-            border-radius: 15px;
-            padding: 25px;
-            margin: 25px 0;
-            border-left: 5px solid #2790FF;
-            display: none;
-        }
-
-        .followup-section h4 {
-            color: #2790FF;
-            margin-top: 0;
-            font-size: 1.2em;
-            margin-bottom: 10px;
-        }
-
-        .followup-section p.subtitle {
-            margin: 0 0 15px 0;
-            color: #666;
-            font-size: 0.9rem;
-        }
-
-        .followup-suggestions {
-            display: flex;
-            flex-wrap: wrap;
-            gap: 12px;
-            margin-top: 15px;
-        }
-
-        .followup-chip {
-            background: white;
-            border: 2px solid #2790FF;
-            color: #2790FF;
-            padding: 12px 20px;
-            border-radius: 25px;
-            font-size: 0.9rem;
-            cursor: pointer;
-            transition: all 0.3s ease;
-            font-family: 'Calibri', sans-serif;
-            font-weight: 500;
-            display: inline-flex;
-            align-items: center;
-            gap: 8px;
-        }
-
-        .followup-chip:hover {
-            background: #2790FF;
-            color: white;
-            transform: translateY(-2px);
-            box-shadow: 0 4px 12px rgba(39, 144, 255, 0.3);
-        }
-
-        .followup-chip:active {
-            transform: translateY(0);
-        }
-
-        .followup-chip::before {
-            content: "→";
-            font-weight: bold;
-            font-size: 1.1em;
-        }
-
-        /* Follow-up input container */
-        .followup-container {
-            display: flex;
-            gap: 10px;
-            margin-top: 15px;
-        }
-
-        .followup-response {
-            margin-top: 20px;
-            padding: 20px;
-            background: rgba(255, 255, 255, 0.8);
-            border-radius: 10px;
-            border-left: 3px solid #2790FF;
-            display: none;
-            max-height: 300px;
-            overflow-y: auto;
-            white-space: pre-line;
-        }
-
-        .sources-section {
-            margin-top: 30px;
-        }
-
-        .sources-grid {
-            display: grid;
-            grid-template-columns: repeat(4, 1fr);
-            gap: 25px;
-            margin-top: 20px;
-        }
-
-        .source-category {
-            background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%);
-            border-radius: 15px;
-            padding: 25px;
-            border-left: 5px solid #2790FF;
-        }
-
-        .source-category h4 {
-            color: #2790FF;
-            margin-top: 0;
-            font-size: 1.2em;
-        }
-
-        .source-item {
-            background: rgba(255, 255, 255, 0.7);
-            border-radius: 8px;
-            padding: 12px;
-            margin: 8px 0;
-            border-left: 3px solid #2790FF;
-            font-size: 0.9em;
-        }
-
-        .source-item a {
-            color: #000000;
-            text-decoration: none;
-            font-weight: 500;
-        }
-
-        .source-item a:hover {
-            text-decoration: underline;
-        }
-
-        .loading {
-            display: inline-block;
-            width: 20px;
-            height: 20px;
-            border: 2px solid #f3f3f3;
-            border-top: 2px solid #2790FF;
-            border-radius: 50%;
-            animation: spin 1s linear infinite;
-        }
-
-        @keyframes spin {
-            0% { transform: rotate(0deg); }
-            100% { transform: rotate(360deg); }
-        }
-
-        .results-container {
-            display: none;
-        }
-
-        .results-container.show + .features {
-            display: none;
-        }
-
-        /* ATHENA SECTION STYLING */
-        .athena-section {
-            background: linear-gradient(135deg, #e3f2fd 0%, #bbdefb 100%);
-            border-radius: 15px;
-            padding: 25px;
-            margin: 25px 0;
-            border-left: 5px solid #2790FF;
-        }
-
-        .athena-section h3 {
-            color: #2790FF;
-            margin-top: 0;
-            font-size: 1.3em;
-        }
-
-        .sql-query {
-            background: #263238;
-            color: #e0e0e0;
-            padding: 15px;
-            border-radius: 8px;
-            font-family: 'Courier New', monospace;
-            font-size: 12px;
-            overflow-x: auto;
-            margin: 15px 0;
-        }
-
-        .data-table {
-            overflow-x: auto;
-            margin: 15px 0;
-        }
-
-        .data-table table {
-            width: 100%;
-            border-collapse: collapse;
-            min-width: 500px;
-        }
-
-        .data-table th, .data-table td {
-            padding: 8px 12px;
-            text-align: left;
-            border-bottom: 1px solid #ddd;
-        }
-
-        .data-table th {
-            background: #f5f5f5;
-            font-weight: bold;
-        }
-
-        .athena-badge {
-            background: linear-gradient(45deg, #2790FF, #4da6ff);
-            color: white;
-            padding: 4px 12px;
-            border-radius: 12px;
-            font-size: 0.8em;
-            font-weight: bold;
-            display: inline-block;
-            margin-left: 10px;
-        }
-
-        /* Agent Identification Modal */
-        .modal-overlay {
-            display: none;
-            position: fixed;
-            top: 0;
-            left: 0;
-            width: 100%;
-            height: 100%;
-            background: rgba(0, 0, 0, 0.7);
-            z-index: 9999;
-            justify-content: center;
-            align-items: center;
-        }
-
-        .modal-overlay.show {
-            display: flex;
-        }
-
-        .modal-content {
-            background: white;
-            padding: 40px;
-            border-radius: 20px;
-            box-shadow: 0 10px 40px rgba(0, 0, 0, 0.3);
-            max-width: 400px;
-            width: 90%;
-            text-align: center;
-        }
-
-        .modal-content h2 {
-            color: #2790FF;
-            margin-bottom: 20px;
-            font-size: 24px;
-        }
-
-        .modal-content p {
-            color: #666;
-            margin-bottom: 25px;
-            line-height: 1.6;
-        }
-
-        .modal-content input {
-            width: 100%;
-            padding: 15px;
-            border: 2px solid #e1e5e9;
-            border-radius: 10px;
-            font-size: 16px;
-            margin-bottom: 20px;
-            font-family: 'Calibri', sans-serif;
-        }
-
-        .modal-content input:focus {
-            border-color: #2790FF;
-            outline: none;
-        }
-
-        .modal-content button {
-            width: 100%;
-            padding: 15px;
-            background: linear-gradient(45deg, #2790FF, #4da6ff);
-            color: white;
-            border: none;
-            border-radius: 10px;
-            font-size: 16px;
-            font-weight: 600;
-            cursor: pointer;
-            font-family: 'Calibri', sans-serif;
-        }
-
-        .modal-content button:hover {
-            transform: translateY(-2px);
-            box-shadow: 0 5px 15px rgba(39, 144, 255, 0.3);
-        }
-
-        .agent-badge-top {
-            display: inline-block;
-            background: linear-gradient(45deg, #2790FF, #4da6ff);
-            color: white;
-            padding: 8px 16px;
-            border-radius: 20px;
-            font-weight: 600;
-            font-size: 14px;
-            margin-left: 10px;
-        }
-    </style>
-</head>
-<body>
-    <!-- Agent Identification Modal -->
-    <div id="agentModal" class="modal-overlay">
-        <div class="modal-content">
-            <h2>👋 Welcome!</h2>
-            <p>To help us track support activity, please enter your name:</p>
-            <input type="text" id="agentNameInput" placeholder="Your name (e.g., Sarah, John)" autocomplete="off">
-            <button id="submitAgentName">Continue</button>
-        </div>
-    </div>
-
-    <div class="container">
-        <div style="text-align: right; margin-bottom: 10px; display: flex; justify-content: space-between; align-items: center;">
-            <span id="agentBadge" class="agent-badge-top" style="display: none;">👤 <span id="agentNameDisplay"></span></span>
-            {% if is_admin %}
-            <a href="/dashboard" style="display: inline-block; padding: 10px 20px; background: linear-gradient(45deg, #764ba2, #667eea); color: white; text-decoration: none; border-radius: 20px; font-weight: 600; font-size: 14px; transition: all 0.3s;">📊 View Dashboard</a>
-            {% endif %}
-        </div>
-        <h1><img src="/blueshift-favicon.png" alt="Blueshift" style="height: 40px; vertical-align: middle; margin-right: 10px;">Blueshift Support Bot</h1>
-
-        <div class="search-container">
-            <input type="text" id="queryInput" placeholder="Enter your support question">
-            <button id="searchBtn">Get Support Analysis</button>
-        </div>
-
-        <div id="resultsContainer" class="results-container">
-            <div class="response-section">
-                <div id="responseContent" class="response-content"></div>
-            </div>
-
-            <div class="followup-section" id="followupSection" style="display: block;">
-                <h4>💬 Continue the conversation</h4>
-                <p class="subtitle">Ask a follow-up question about this topic:</p>
-                <div style="display: flex; gap: 10px; margin-top: 15px;">
-                    <input type="text" id="followupInput" placeholder="Type your follow-up question..." style="flex: 1; padding: 12px 20px; border: 2px solid #2790FF; border-radius: 25px; font-size: 14px; outline: none; font-family: 'Calibri', sans-serif;">
-                    <button id="followupBtn" style="background: linear-gradient(45deg, #2790FF, #4da6ff); color: white; padding: 12px 25px; border: none; border-radius: 25px; font-size: 14px; cursor: pointer; font-family: 'Calibri', sans-serif; font-weight: 600;">Ask</button>
-                </div>
-                <div id="followupResponse" style="margin-top: 20px; padding: 20px; background: rgba(255, 255, 255, 0.9); border-radius: 10px; border-left: 3px solid #2790FF; display: none;"></div>
-            </div>
-
-            <div id="athenaSection" class="athena-section" style="display: none;">
-                <h3>📊 Suggested Query <span class="athena-badge">ATHENA</span></h3>
-                <p><strong>Database:</strong> <span id="athenaDatabase" style="font-family: monospace; background: #f0f0f0; padding: 2px 6px; border-radius: 4px;"></span></p>
-                <div><strong>Analysis:</strong></div>
-                <div id="athenaExplanation" style="white-space: pre-line; margin-top: 8px; line-height: 1.6;"></div>
-
-                <div style="margin: 15px 0;">
-                    <label for="suggestedQuery" style="font-weight: bold; color: #2790FF;">Copy this query to Athena:</label>
-                    <textarea id="suggestedQuery" class="sql-query" style="width: 100%; height: 120px; margin-top: 5px; font-family: 'Courier New', monospace; font-size: 12px; border: 2px solid #2790FF; border-radius: 8px; padding: 10px;" readonly placeholder="SQL query suggestion will appear here..."></textarea>
-                    <p style="margin-top: 10px; color: #666; font-size: 0.9em;">💡 <strong>Instructions:</strong> Copy this query to AWS Athena console and customize with specific account_uuid, campaign_uuid, and date ranges for your support case.</p>
-                </div>
-            </div>
-
-            <div class="sources-section">
-                <h3>Related Resources</h3>
-                <div id="sourcesGrid" class="sources-grid"></div>
-            </div>
-
-        </div>
-
-        <div class="features">
-            <div class="feature">
-                <h3>🎫 Related JIRAs</h3>
-                <ul>
-                    <li>Links to relevant JIRA tickets and bugs</li>
-                    <li>Known issues and their current status</li>
-                    <li>Engineering updates and fixes</li>
-                    <li>Product roadmap items</li>
-                </ul>
-            </div>
-
-            <div class="feature">
-                <h3>📚 Help Docs & APIs</h3>
-                <ul>
-                    <li>Official Blueshift help center articles</li>
-                    <li>API documentation and endpoints</li>
-                    <li>SDK integration guides</li>
-                    <li>Setup and configuration instructions</li>
-                </ul>
-            </div>
-
-            <div class="feature">
-                <h3>🏢 Confluence</h3>
-                <ul>
-                    <li>Internal Confluence documentation</li>
-                    <li>Team knowledge base articles</li>
-                    <li>Troubleshooting runbooks</li>
-                    <li>Engineering documentation</li>
-                </ul>
-            </div>
-
-            <div class="feature">
-                <h3>🎯 Zendesk</h3>
-                <ul>
-                    <li>Customer support ticket analysis</li>
-                    <li>Similar issue resolutions</li>
-                    <li>Support team responses</li>
-                    <li>Escalation procedures</li>
-                </ul>
-            </div>
-        </div>
-    </div>
-
-    <script>
-        // Check if agent needs to identify themselves
-        const agentIdentified = sessionStorage.getItem('agentIdentified');
-        const agentName = sessionStorage.getItem('agentName');
-
-        if (!agentIdentified) {
-            document.getElementById('agentModal').classList.add('show');
-        } else if (agentName) {
-            // Show agent badge if already identified
-            document.getElementById('agentNameDisplay').textContent = agentName;
-            document.getElementById('agentBadge').style.display = 'inline-block';
-        }
-
-        // Handle agent identification
-        document.getElementById('submitAgentName').addEventListener('click', function() {
-            const agentName = document.getElementById('agentNameInput').value.trim();
-            if (!agentName) {
-                alert('Please enter your name');
-                return;
-            }
-
-            fetch('/identify-agent', {
-                method: 'POST',
-                headers: {'Content-Type': 'application/json'},
-                body: JSON.stringify({ agent_name: agentName })
-            })
-            .then(response => response.json())
-            .then(data => {
-                if (data.success) {
-                    sessionStorage.setItem('agentIdentified', 'true');
-                    sessionStorage.setItem('agentName', agentName);
-                    document.getElementById('agentModal').classList.remove('show');
-                    // Show agent badge
-                    document.getElementById('agentNameDisplay').textContent = agentName;
-                    document.getElementById('agentBadge').style.display = 'inline-block';
-                } else {
-                    alert('Error: ' + (data.error || 'Failed to identify agent'));
-                }
-            })
-            .catch(error => {
-                alert('Error: ' + error);
-            });
-        });
-
-        // Allow Enter key to submit
-        document.getElementById('agentNameInput').addEventListener('keypress', function(e) {
-            if (e.key === 'Enter') {
-                document.getElementById('submitAgentName').click();
-            }
-        });
-
-        document.getElementById('searchBtn').addEventListener('click', function() {
-            const query = document.getElementById('queryInput').value.trim();
-            if (!query) {
-                alert('Please enter a question first');
-                return;
-            }
-
-            // Show loading
-            document.getElementById('searchBtn').innerHTML = '<span class="loading"></span> Analyzing...';
-            document.getElementById('searchBtn').disabled = true;
-
-            fetch('/query', {
-                method: 'POST',
-                headers: {'Content-Type': 'application/json'},
-                body: JSON.stringify({ query: query })
-            })
-            .then(response => response.json())
-            .then(data => {
-                if (data.error) {
-                    alert('Error: ' + data.error);
-                    return;
-                }
-
-                // Show response with markdown rendering
-                if (typeof marked !== 'undefined') {
-                    document.getElementById('responseContent').innerHTML = marked.parse(data.response);
-                } else {
-                    document.getElementById('responseContent').textContent = data.response;
-                }
-                const resultsContainer = document.getElementById('resultsContainer');
-                resultsContainer.style.display = 'block';
-                resultsContainer.classList.add('show');
-
-                // Show resources in 4-column grid
-                showResources(data.resources);
-
-                // Show Athena insights if available
-                if (data.athena_insights) {
-                    showAthenaInsights(data.athena_insights);
-                }
-
-                // Follow-up section is always visible now
-
-                // Reset button
-                document.getElementById('searchBtn').innerHTML = 'Get Support Analysis';
-                document.getElementById('searchBtn').disabled = false;
-            })
-            .catch(error => {
-                alert('Error: ' + error);
-                document.getElementById('searchBtn').innerHTML = 'Get Support Analysis';
-                document.getElementById('searchBtn').disabled = false;
-            });
-        });
-
-        // Follow-up button handler
-        document.getElementById('followupBtn').addEventListener('click', function() {
-            const followupQuery = document.getElementById('followupInput').value.trim();
-            if (!followupQuery) {
-                alert('Please enter a follow-up question');
-                return;
-            }
-
-            document.getElementById('followupBtn').innerHTML = 'Processing...';
-            document.getElementById('followupBtn').disabled = true;
-
-            fetch('/followup', {
-                method: 'POST',
-                headers: {'Content-Type': 'application/json'},
-                body: JSON.stringify({ query: followupQuery })
-            })
-            .then(response => response.json())
-            .then(data => {
-                if (data.error) {
-                    alert('Error: ' + data.error);
-                    return;
-                }
-
-                // Show response with markdown rendering
-                const followupResponseDiv = document.getElementById('followupResponse');
-                if (typeof marked !== 'undefined') {
-                    followupResponseDiv.innerHTML = marked.parse(data.response);
-                } else {
-                    followupResponseDiv.textContent = data.response;
-                }
-                followupResponseDiv.style.display = 'block';
-                document.getElementById('followupInput').value = '';
-
-                document.getElementById('followupBtn').innerHTML = 'Ask';
-                document.getElementById('followupBtn').disabled = false;
-            })
-            .catch(error => {
-                alert('Error: ' + error);
-                document.getElementById('followupBtn').innerHTML = 'Ask';
-                document.getElementById('followupBtn').disabled = false;
-            });
-        });
-
-        // Allow Enter key in follow-up input
-        document.getElementById('followupInput').addEventListener('keypress', function(e) {
-            if (e.key === 'Enter') {
-                document.getElementById('followupBtn').click();
-            }
-        });
-
-        function showResources(resources) {
-            const sourcesGrid = document.getElementById('sourcesGrid');
-            sourcesGrid.innerHTML = '';
-
-            const categories = [
-                { key: 'jira_tickets', title: '🎫 JIRA Tickets', icon: '🎫' },
-                { key: 'help_docs', title: '📚 Help Docs & APIs', icon: '📚' },
-                { key: 'confluence_docs', title: '🏢 Confluence Pages', icon: '🏢' },
-                { key: 'support_tickets', title: '🎯 Zendesk', icon: '🎯' }
-            ];
-
-            categories.forEach(category => {
-                const categoryDiv = document.createElement('div');
-                categoryDiv.className = 'source-category';
-                categoryDiv.innerHTML = `<h4>${category.title}</h4>`;
-
-                // For Help Docs, combine both help_docs and api_docs
-                let items = [];
-                if (category.key === 'help_docs') {
-                    items = [...(resources['help_docs'] || []), ...(resources['api_docs'] || [])];
-                } else {
-                    items = resources[category.key] || [];
-                }
-
-                items.forEach(item => {
-                    const itemDiv = document.createElement('div');
-                    itemDiv.className = 'source-item';
-                    itemDiv.innerHTML = `<a href="${item.url}" target="_blank">${item.title}</a>`;
-                    categoryDiv.appendChild(itemDiv);
-                });
-
-                sourcesGrid.appendChild(categoryDiv);
-            });
-        }
-
-        // Allow Enter key to trigger search
-        document.getElementById('queryInput').addEventListener('keypress', function(e) {
-            if (e.key === 'Enter') {
-                document.getElementById('searchBtn').click();
-            }
-        });
-
-        // Removed old followup input event listener - now using interactive chips
-
-        function showAthenaInsights(athenaData) {
-            // Show the Athena section
-            document.getElementById('athenaSection').style.display = 'block';
-
-            // Set database
-            document.getElementById('athenaDatabase').textContent = athenaData.database || 'default';
-
-            // Set explanation
-            document.getElementById('athenaExplanation').textContent = athenaData.explanation;
-
-            // Set editable SQL query
-            document.getElementById('suggestedQuery').value = athenaData.sql_query;
-
-        }
-
-    </script>
-</body>
-</html>
-'''
-
-DASHBOARD_TEMPLATE = '''
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Agent Activity Dashboard</title>
-    <link rel="icon" type="image/png" sizes="32x32" href="/blueshift-favicon.png">
-    <style>
-        * {
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }
-
-        body {
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh;
-            padding: 20px;
-        }
-
-        .dashboard-container {
-            max-width: 1400px;
-            margin: 0 auto;
-        }
-
-        .header {
-            background: white;
-            padding: 20px 30px;
-            border-radius: 15px;
-            box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-            margin-bottom: 30px;
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-        }
-
-        .header h1 {
-            color: #333;
-            font-size: 28px;
-        }
-
-        .header-info {
-            display: flex;
-            gap: 20px;
-            align-items: center;
-        }
-
-        .agent-badge {
-            background: #667eea;
-            color: white;
-            padding: 8px 16px;
-            border-radius: 20px;
-            font-weight: 600;
-        }
-
-        .export-btn {
-            background: #667eea;
-            color: white;
-            padding: 10px 20px;
-            border: none;
-            border-radius: 8px;
-            font-weight: 600;
-            cursor: pointer;
-            transition: all 0.3s;
-            font-size: 14px;
-        }
-
-        .export-btn:hover {
-            background: #5568d3;
-            transform: translateY(-2px);
-        }
-
-        .back-btn {
-            background: #764ba2;
-            color: white;
-            padding: 10px 20px;
-            border-radius: 8px;
-            text-decoration: none;
-            font-weight: 600;
-            transition: all 0.3s;
-        }
-
-        .back-btn:hover {
-            background: #5a3980;
-            transform: translateY(-2px);
-        }
-
-        .stats-grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(300px, 1fr));
-            gap: 20px;
-            margin-bottom: 30px;
-        }
-
-        .stat-card {
-            background: white;
-            padding: 25px;
-            border-radius: 15px;
-            box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-        }
-
-        .stat-card h3 {
-            color: #667eea;
-            font-size: 18px;
-            margin-bottom: 15px;
-        }
-
-        .stat-number {
-            font-size: 36px;
-            font-weight: bold;
-            color: #333;
-            margin-bottom: 10px;
-        }
-
-        .stat-label {
-            color: #666;
-            font-size: 14px;
-        }
-
-        .agent-list {
-            list-style: none;
-        }
-
-        .agent-item {
-            display: flex;
-            justify-content: space-between;
-            padding: 10px 0;
-            border-bottom: 1px solid #eee;
-        }
-
-        .agent-item:last-child {
-            border-bottom: none;
-        }
-
-        .agent-name {
-            font-weight: 600;
-            color: #333;
-        }
-
-        .query-count {
-            background: #667eea;
-            color: white;
-            padding: 4px 12px;
-            border-radius: 12px;
-            font-size: 14px;
-            font-weight: 600;
-        }
-
-        .activity-section {
-            background: white;
-            padding: 30px;
-            border-radius: 15px;
-            box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-            margin-bottom: 30px;
-        }
-
-        .activity-section h2 {
-            color: #333;
-            margin-bottom: 20px;
-            font-size: 24px;
-        }
-
-        .activity-table {
-            width: 100%;
-            border-collapse: collapse;
-        }
-
-        .activity-table th {
-            background: #667eea;
-            color: white;
-            padding: 12px;
-            text-align: left;
-            font-weight: 600;
-        }
-
-        .activity-table td {
-            padding: 12px;
-            border-bottom: 1px solid #eee;
-        }
-
-        .activity-table tr:hover {
-            background: #f8f9fa;
-        }
-
-        .status-badge {
-            padding: 4px 10px;
-            border-radius: 12px;
-            font-size: 12px;
-            font-weight: 600;
-        }
-
-        .status-success {
-            background: #d4edda;
-            color: #155724;
-        }
-
-        .status-error {
-            background: #f8d7da;
-            color: #721c24;
-        }
-
-        .keyword-list {
-            display: flex;
-            flex-wrap: wrap;
-            gap: 10px;
-        }
-
-        .keyword-tag {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 8px 16px;
-            border-radius: 20px;
-            font-size: 14px;
-            font-weight: 600;
-        }
-
-        .keyword-count {
-            background: rgba(255, 255, 255, 0.3);
-            padding: 2px 8px;
-            border-radius: 10px;
-            margin-left: 6px;
-        }
-
-        .chart-container {
-            margin-top: 20px;
-        }
-
-        .trend-bar {
-            display: flex;
-            align-items: center;
-            margin-bottom: 12px;
-        }
-
-        .trend-date {
-            width: 120px;
-            font-weight: 600;
-            color: #333;
-        }
-
-        .trend-bar-fill {
-            background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
-            height: 30px;
-            border-radius: 15px;
-            display: flex;
-            align-items: center;
-            padding: 0 12px;
-            color: white;
-            font-weight: 600;
-            min-width: 40px;
-        }
+# --- Precompressed pages ---
+def build_precompressed_page(html):
+    """Encode a fully rendered page once, with its gzip variant and ETag"""
+    body = html.encode('utf-8')
+    return {
+        'body': body,
+        'gzip': gzip.compress(body, compresslevel=9),
+        'etag': hashlib.sha1(body).hexdigest()
+    }
 
-        .empty-state {
-            text-align: center;
-            padding: 40px;
-            color: #666;
-        }
-    </style>
-</head>
-<body>
-    <div class="dashboard-container">
-        <div class="header">
-            <h1>📊 Agent Activity Dashboard</h1>
-            <div class="header-info">
-                <span class="agent-badge">👤 {{ agent_name }}</span>
-                <button onclick="exportQueries()" class="export-btn">📥 Export All Queries</button>
-                <a href="/" class="back-btn">← Back to Support Bot</a>
-            </div>
-        </div>
-
-        <div class="stats-grid">
-            <div class="stat-card">
-                <h3>Total Queries (Last 30 Days)</h3>
-                <div class="stat-number">{{ stats.recent_activity|length }}</div>
-                <div class="stat-label">across all agents</div>
-            </div>
-
-            <div class="stat-card">
-                <h3>Active Agents</h3>
-                <div class="stat-number">{{ stats.queries_by_agent|length }}</div>
-                <div class="stat-label">agents have used the bot</div>
-            </div>
-
-            <div class="stat-card">
-                <h3>Queries by Agent</h3>
-                {% if stats.queries_by_agent %}
-                <ul class="agent-list">
-                    {% for agent, count in stats.queries_by_agent[:5] %}
-                    <li class="agent-item">
-                        <span class="agent-name">{{ agent if agent != 'Unknown Agent' else agent + ' ⚠️' }}</span>
-                        <span class="query-count">{{ count }}</span>
-                    </li>
-                    {% endfor %}
-                </ul>
-                <p style="font-size: 11px; color: #999; margin-top: 10px;">⚠️ Unknown Agent = queries before tracking was enabled</p>
-                {% else %}
-                <div class="empty-state">No activity yet</div>
-                {% endif %}
-            </div>
-        </div>
-
-        <div class="activity-section">
-            <h2>Top Search Topics</h2>
-            {% if top_keywords %}
-            <div class="keyword-list">
-                {% for keyword, count in top_keywords %}
-                <div class="keyword-tag">
-                    {{ keyword }}
-                    <span class="keyword-count">{{ count }}</span>
-                </div>
-                {% endfor %}
-            </div>
-            {% else %}
-            <div class="empty-state">No search data available</div>
-            {% endif %}
-        </div>
-
-        <div class="activity-section">
-            <h2>Monthly Trend by Agent (Last 6 Months)</h2>
-            {% if stats.monthly_data %}
-            <div class="chart-container">
-                {% for month in stats.monthly_data|dictsort(reverse=true) %}
-                <div style="margin-bottom: 25px;">
-                    <h4 style="color: #667eea; margin-bottom: 10px;">{{ month[0] }}</h4>
-                    {% for agent, count in month[1].items() %}
-                    <div class="trend-bar" style="margin-bottom: 8px;">
-                        <span class="trend-date" style="width: 180px;">{{ agent }}</span>
-                        <div class="trend-bar-fill" style="width: {{ (count * 15) + 50 }}px; background: linear-gradient(90deg, #2790FF 0%, #4da6ff 100%);">
-                            {{ count }}
-                        </div>
-                    </div>
-                    {% endfor %}
-                </div>
-                {% endfor %}
-            </div>
-            {% else %}
-            <div class="empty-state">No monthly data available</div>
-            {% endif %}
-        </div>
-
-        <div class="activity-section">
-            <h2>Daily Activity Trend (Last 14 Days)</h2>
-            {% if stats.daily_trends %}
-            <div class="chart-container">
-                {% for date, count in stats.daily_trends[:14] %}
-                <div class="trend-bar">
-                    <span class="trend-date">{{ date }}</span>
-                    <div class="trend-bar-fill" style="width: {{ (count * 10) + 40 }}px;">
-                        {{ count }}
-                    </div>
-                </div>
-                {% endfor %}
-            </div>
-            {% else %}
-            <div class="empty-state">No trend data available</div>
-            {% endif %}
-        </div>
-
-        <div class="activity-section">
-            <h2>Recent Activity</h2>
-            {% if stats.recent_activity %}
-            <table class="activity-table">
-                <thead>
-                    <tr>
-                        <th>Agent</th>
-                        <th>Query</th>
-                        <th>Time</th>
-                        <th>Status</th>
-                    </tr>
-                </thead>
-                <tbody>
-                    {% for agent, query, timestamp, status in stats.recent_activity[:20] %}
-                    <tr>
-                        <td><strong>{{ agent }}</strong></td>
-                        <td>{{ query[:100] }}{% if query|length > 100 %}...{% endif %}</td>
-                        <td>{{ timestamp }}</td>
-                        <td>
-                            <span class="status-badge {% if status == 'success' %}status-success{% else %}status-error{% endif %}">
-                                {{ status }}
-                            </span>
-                        </td>
-                    </tr>
-                    {% endfor %}
-                </tbody>
-            </table>
-            {% else %}
-            <div class="empty-state">No recent activity</div>
-            {% endif %}
-        </div>
-    </div>
-
-    <script>
-        function exportQueries() {
-            window.location.href = '/dashboard/export';
-        }
-    </script>
-</body>
-</html>
-'''
+def precompressed_page_response(page, cache_control='private, no-cache', vary='Accept-Encoding, Cookie'):
+    """Serve a prerendered page (gzipped when accepted), answering If-None-Match with 304"""
+    use_gzip = 'gzip' in request.accept_encodings
+    response = make_response(page['gzip'] if use_gzip else page['body'])
+    response.mimetype = 'text/html'
+    if use_gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.set_etag(page['etag'] + ('-gz' if use_gzip else ''))
+    response.headers['Vary'] = vary
+    # Defaults suit the main page: it sits behind login and differs for admins - the browser keeps it but always revalidates
+    response.headers['Cache-Control'] = cache_control
+    return response.make_conditional(request)
+
+def static_asset_version(filename):
+    """Short content hash of a file in static/, used to cache-bust long-lived asset URLs"""
+    with open(os.path.join(app.static_folder, filename), 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()[:12]
+
+REST_CSS_VERSION = static_asset_version('rest.css')
+
+# templates/index.html only varies on is_admin, so both variants are rendered and compressed once at import
+with app.app_context():
+    MAIN_PAGES = {is_admin: build_precompressed_page(render_template('index.html', is_admin=is_admin,
+                                                                     rest_css_version=REST_CSS_VERSION))
+                  for is_admin in (False, True)}
+    # The login page takes no context at all
+    LOGIN_PAGE = build_precompressed_page(render_template('login.html'))
 
 if __name__ == '__main__':
-    print("Starting Blueshift Support Bot with AWS Athena Integration...")
     port = int(os.environ.get('PORT', 8103))
-    print(f"Visit: http://localhost:{port}")
-    print(f"AWS Region: {AWS_REGION}")
-    print(f"Athena Databases: {', '.join(ATHENA_DATABASES)}")
-    print(f"Athena S3 Output: {ATHENA_S3_OUTPUT}")
-
-    # Debug: Check environment variables
-    print(f"\n=== Environment Variables Debug ===")
-    print(f"JIRA_TOKEN: {'SET' if JIRA_TOKEN else 'NOT SET'}")
-    print(f"JIRA_EMAIL: {'SET' if JIRA_EMAIL else 'NOT SET'}")
-    print(f"CONFLUENCE_TOKEN: {'SET' if CONFLUENCE_TOKEN else 'NOT SET'}")
-    print(f"CONFLUENCE_EMAIL: {'SET' if CONFLUENCE_EMAIL else 'NOT SET'}")
-    print(f"ZENDESK_TOKEN: {'SET' if ZENDESK_TOKEN else 'NOT SET'}")
-    print(f"ZENDESK_EMAIL: {'SET' if ZENDESK_EMAIL else 'NOT SET'}")
-    print(f"ZENDESK_SUBDOMAIN: {'SET' if ZENDESK_SUBDOMAIN else 'NOT SET'}")
-    print("=" * 40)
-    
-    # Print API status results
-    print("\n=== External API Status ===")
-    for api, status in API_STATUS.items():
-        print(f"{api.upper()}: {'✅ Connected' if status else '❌ Failed/Missing Credentials'}")
-    print("=" * 40)
-
-    # ADDED Diagnostic Print Statement
-    print("--- ATTEMPTING TO START FLASK APP ---")
-
-    app.run(host='0.0.0.0', port=port, debug=True)
+    logger.info(f"Starting Blueshift Support Bot with AWS Athena Integration - visit: http://localhost:{port}")
+
+    # Full configuration / API status banner, written in one go (opt-in via DEBUG_BANNER=1)
+    if os.environ.get('DEBUG_BANNER'):
+        banner = '\n'.join([
+            f"AWS Region: {AWS_REGION}",
+            f"Athena Databases: {', '.join(ATHENA_DATABASES)}",
+            f"Athena S3 Output: {ATHENA_S3_OUTPUT}",
+            "",
+            "=== Environment Variables Debug ===",
+            f"JIRA_TOKEN: {'SET' if JIRA_TOKEN else 'NOT SET'}",
+            f"JIRA_EMAIL: {'SET' if JIRA_EMAIL else 'NOT SET'}",
+            f"CONFLUENCE_TOKEN: {'SET' if CONFLUENCE_TOKEN else 'NOT SET'}",
+            f"CONFLUENCE_EMAIL: {'SET' if CONFLUENCE_EMAIL else 'NOT SET'}",
+            f"ZENDESK_TOKEN: {'SET' if ZENDESK_TOKEN else 'NOT SET'}",
+            f"ZENDESK_EMAIL: {'SET' if ZENDESK_EMAIL else 'NOT SET'}",
+            f"ZENDESK_SUBDOMAIN: {'SET' if ZENDESK_SUBDOMAIN else 'NOT SET'}",
+            "=" * 40,
+            "",
+            "=== External API Status ===",
+            *(f"{api.upper()}: {'✅ Connected' if status else '❌ Failed/Missing Credentials'}" for api, status in API_STATUS.items()),
+            "=" * 40,
+        ])
+        sys.stdout.write(banner + '\n')
+        sys.stdout.flush()
+
+    # Local development only - production runs under gunicorn (see gunicorn_conf.py)
+    app.run(host='0.0.0.0', port=port, debug=os.environ.get('FLASK_DEBUG') == '1')
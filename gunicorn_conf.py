@@ -0,0 +1,29 @@
+# Gunicorn configuration for production
+# Run with: gunicorn -c gunicorn_conf.py app:app
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8103')}"
+
+# Threaded workers - request time is dominated by outbound I/O (JIRA, Confluence, Zendesk, Claude, Athena).
+# gthread rather than gevent: the app fans out on its own thread pools and calls boto3, neither of which
+# should be monkey-patched. SSE answer streams hold a thread for the whole Claude response, hence 16 per worker.
+worker_class = 'gthread'
+workers = int(os.environ.get('GUNICORN_WORKERS', 2 * multiprocessing.cpu_count() + 1))
+# app.py sizes its outbound I/O pools from the same variable - set it in the environment rather than with --threads
+threads = int(os.environ.get('GUNICORN_THREADS', 16))
+
+# Keep browser connections open between the page, /identify-agent, /query and the stream requests
+keepalive = 5
+
+# Worker heartbeat timeout, not a request timeout: under gthread the worker's main loop keeps notifying
+# the arbiter while requests run on its threads, so this only kills a worker that stops responding altogether.
+# Request time is bounded in the app (search, help doc fetch, Claude and Athena deadlines).
+timeout = 120
+
+# Import the app once in the master so workers share the prerendered pages copy-on-write
+# (and the same SECRET_KEY fallback, so sessions stay valid across workers)
+preload_app = True
+
+accesslog = '-'
+errorlog = '-'
@@ -0,0 +1,103 @@
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ATHENA_AI_RESPONSE = """DATABASE:
+customer_campaign_logs
+
+SQL_QUERY:
+select timestamp, user_uuid, message
+from customer_campaign_logs.campaign_execution_v3
+where account_uuid = 'client_account_uuid'
+and message like '%QuietHours%'
+limit 100
+
+INSIGHT_EXPLANATION:
+Shows quiet hours evaluations for the campaign.
+"""
+
+
+@pytest.fixture
+def app_module(tmp_path, monkeypatch):
+    # The activity database is created relative to the working directory on import
+    monkeypatch.chdir(tmp_path)
+    import app
+    app.ATHENA_INSIGHTS_CACHE.clear()
+    app.QUERY_RESPONSE_CACHE.clear()
+    # Athena itself is mocked: the generated query "validates" with one sample row
+    monkeypatch.setattr(app, 'query_athena', lambda query, database, description='': {
+        'data': [{'timestamp': '2024-12-01', 'user_uuid': 'u1', 'message': 'QuietHours'}],
+        'columns': ['timestamp', 'user_uuid', 'message'],
+    })
+    return app
+
+
+def test_generate_athena_insights_reaches_claude(app_module, monkeypatch):
+    prompts = []
+
+    def fake_claude(query, platform_resources=None, temperature=0.2):
+        prompts.append(query)
+        return ATHENA_AI_RESPONSE
+
+    monkeypatch.setattr(app_module, 'call_gemini_api', fake_claude)
+
+    insights = app_module.generate_athena_insights('quiet hours not working')
+
+    assert len(prompts) == 1
+    assert "message like '%{feature_pattern}%'" in prompts[0]
+    assert 'QuietHours' in insights['sql_query']
+    assert insights['has_data'] is True
+    assert app_module.get_cached_query_result(app_module.ATHENA_INSIGHTS_CACHE, 'quiet hours not working') == insights
+
+
+def fake_answer_pipeline(app_module, monkeypatch):
+    """Mock everything answer_query touches besides the Athena insights path"""
+    def fake_claude(query, platform_resources=None, temperature=0.2):
+        # The Athena analysis prompt is the only deterministic (temperature 0) call
+        return ATHENA_AI_RESPONSE if temperature == 0.0 else 'Enable quiet hours in the campaign settings.'
+
+    monkeypatch.setattr(app_module, 'call_gemini_api', fake_claude)
+    monkeypatch.setattr(app_module, 'generate_related_resources_improved',
+                        lambda query: {'platform_resources_with_content': []})
+    monkeypatch.setattr(app_module, 'generate_followup_suggestions', lambda query, response: [])
+    monkeypatch.setattr(app_module, 'log_agent_activity', lambda **kwargs: None)
+
+
+def test_answer_query_returns_insights_from_athena_pool(app_module, monkeypatch):
+    fake_answer_pipeline(app_module, monkeypatch)
+    submitted = []
+    submit = app_module._ATHENA_POOL.submit
+
+    def tracking_submit(fn, *args):
+        submitted.append(fn)
+        return submit(fn, *args)
+
+    monkeypatch.setattr(app_module._ATHENA_POOL, 'submit', tracking_submit)
+
+    result = app_module.answer_query('quiet hours not working', 'agent')
+
+    assert submitted == [app_module.generate_athena_insights]
+    assert result['athena_insights']['has_data'] is True
+    assert 'QuietHours' in result['athena_insights']['sql_query']
+
+
+def test_answer_query_falls_back_when_athena_times_out(app_module, monkeypatch):
+    fake_answer_pipeline(app_module, monkeypatch)
+    release = threading.Event()
+
+    def slow_insights(query):
+        release.wait(5)
+        return {'has_data': True}
+
+    monkeypatch.setattr(app_module, 'generate_athena_insights', slow_insights)
+    monkeypatch.setattr(app_module, 'ATHENA_INSIGHTS_TIMEOUT_SECONDS', 0.05)
+    try:
+        result = app_module.answer_query('quiet hours not working', 'agent')
+    finally:
+        release.set()
+
+    assert result['athena_insights'] == app_module.get_default_athena_insights('quiet hours not working')